@@ -4,6 +4,7 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models.signals import post_migrate
 from django.dispatch import receiver 
+from core.cache import reference_data_cache
 
 
 class DefaultCalendarActivity(models.Model):
@@ -63,6 +64,13 @@ class Weekend(models.Model):
         return self.day
 
 
+#####################################################################
+##################### reference_data_cache:
+#####################   - dependent on: Weekend.
+#####################   linked with: WeekendAPIView (core/cache.py).
+reference_data_cache.register('weekends', Weekend)
+#####################################################################
+
  
 
 
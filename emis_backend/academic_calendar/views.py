@@ -1,6 +1,9 @@
 # academic_calendar/views.py
 
 from authentication.permissions import IsAdministratorOrStaff 
+from core.cache import reference_data_cache
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated 
@@ -221,20 +224,21 @@ class WeekendAPIView(APIView):
             return Response(serializer.data)
 
         else:
-            # Filter by status or day name if provided
+            # All weekends come from the reference data cache, filter by status or day name if provided
+            weekends = reference_data_cache.get('weekends', lambda: list(WeekendSerializer(Weekend.objects.order_by('id'), many=True).data))
             status_param = request.query_params.get('status')
             day_param = request.query_params.get('day')
 
             if status_param is not None:
-                weekends = Weekend.objects.filter(status=status_param)
+                try:
+                    status_value = BooleanField().to_python(status_param)
+                except ValidationError:
+                    return Response({'error': 'Invalid status.'}, status=status.HTTP_400_BAD_REQUEST)
+                weekends = [weekend for weekend in weekends if weekend['status'] == status_value]
             elif day_param is not None:
-                weekends = Weekend.objects.filter(day=day_param)
-            else:
-                # Retrieve all weekends if no filters are provided
-                weekends = Weekend.objects.all()
+                weekends = [weekend for weekend in weekends if weekend['day'] == day_param]
 
-            serializer = WeekendSerializer(weekends, many=True)
-            return Response(serializer.data)
+            return Response(weekends)
 
     def post(self, request):
         serializer = WeekendSerializer(data=request.data)
@@ -0,0 +1,154 @@
+# academy/cohort.py
+
+import numpy as np
+from student.models import Student
+from .grading import grade_band_index, is_counted
+from .models import Marksheet
+
+
+class CohortGPAEngine:
+    """
+        Compute credit hours, CGPA, term GPA and ranks for a whole cohort at once.
+        A cohort is every student matching all given filters: section, batch, program
+        (through StudentEnrollment) and semester (students with a course offered in that semester).
+
+        Marks are fetched column-wise in one query and graded with NumPy; the records that count are chosen
+        by academy.grading.is_counted(), like the maintained StudentAcademicSummary of the transcript.
+    """
+
+    def __init__(self, section=None, batch=None, program=None, semester=None, published_only=False):
+        self.section = section
+        self.batch = batch
+        self.program = program
+        self.semester = semester
+        self.published_only = published_only
+
+    def get_students(self):
+        students = Student.objects.all()
+        if self.section:
+            students = students.filter(studentenrollment__batch_section_id=self.section)
+        if self.batch:
+            students = students.filter(studentenrollment__batch_section__batch_id=self.batch)
+        if self.program:
+            students = students.filter(studentenrollment__batch_section__batch__program_id=self.program)
+        if self.semester:
+            students = students.filter(courseenrollment__course_offer__semester_id=self.semester)
+        return students.distinct()
+
+    def get_marks(self, students):
+        marksheets = Marksheet.objects.filter(course_enrollment__student__in=students.values('id'))
+        if self.published_only:
+            marksheets = marksheets.filter(is_published=True)
+
+        columns = [
+            'course_enrollment__student_id',
+            'course_enrollment__course_offer__semester_id',
+            'course_enrollment__course_offer__course__credit',
+            'course_enrollment__course_offer__is_complete',
+            'course_enrollment__non_credit',
+            'attendance', 'assignment', 'mid_term', 'final',
+        ]
+        rows = list(marksheets.values_list(*columns))
+        if not rows:
+            return None
+
+        (student_ids, semester_ids, credits, is_complete, non_credit, *marks) = zip(*rows)
+        return {
+            'student_id': np.array(student_ids, dtype=np.int64),
+            'semester_id': np.array(semester_ids, dtype=np.int64),
+            'credit': np.array(credits, dtype=np.float64),
+            'is_complete': np.array(is_complete, dtype=bool),
+            'non_credit': np.array(non_credit, dtype=bool),
+            # None marks become NaN and count as 0
+            'total_marks': np.nansum(np.array(marks, dtype=np.float64), axis=0),
+        }
+
+    @staticmethod
+    def get_grade_points(total_marks):
+        """
+            Vectorized GradeBands.resolve(): grade point per total mark, NaN if no band matches.
+        """
+        lower_marks, higher_marks, bands = grade_band_index.get_bands()
+        if not bands:
+            return np.full(total_marks.shape, np.nan)
+
+        lower_marks = np.array(lower_marks, dtype=np.float64)
+        higher_marks = np.array(higher_marks, dtype=np.float64)
+        grade_points = np.array([float(band.grade_point) for band in bands], dtype=np.float64)
+
+        index = np.searchsorted(lower_marks, total_marks, side='right') - 1
+        safe_index = np.clip(index, 0, len(bands) - 1)
+        matched = (index >= 0) & (total_marks <= higher_marks[safe_index])
+        return np.where(matched, grade_points[safe_index], np.nan)
+
+    @staticmethod
+    def rank(values):
+        """
+            Competition ranking ("1224") in descending order of the values.
+        """
+        if not len(values):
+            return np.array([], dtype=np.int64)
+        # rank on the displayed precision so that equal CGPAs tie
+        values = np.round(values, 3)
+        order = np.argsort(-values, kind='stable')
+        sorted_values = values[order]
+        positions = np.arange(len(values))
+        is_new_value = np.concatenate(([True], sorted_values[1:] != sorted_values[:-1]))
+        sorted_ranks = np.maximum.accumulate(np.where(is_new_value, positions, 0)) + 1
+        ranks = np.empty(len(values), dtype=np.int64)
+        ranks[order] = sorted_ranks
+        return ranks
+
+    def compute(self):
+        students = self.get_students()
+        student_rows = list(students.order_by('id').values_list(
+            'id', 'user__username', 'user__first_name', 'user__middle_name', 'user__last_name'
+        ))
+        student_ids = np.array([row[0] for row in student_rows], dtype=np.int64)
+        count = len(student_ids)
+
+        credit_hours = np.zeros(count)
+        grade_points = np.zeros(count)
+        term_credit_hours = np.zeros(count)
+        term_grade_points = np.zeros(count)
+
+        marks = self.get_marks(students) if count else None
+        if marks is not None:
+            grade_point = self.get_grade_points(marks['total_marks'])
+            counted = is_counted(marks['is_complete'], marks['non_credit'], grade_point)
+            counted_credit = np.where(counted, marks['credit'], 0.0)
+            weighted_points = np.where(counted, grade_point * marks['credit'], 0.0)
+
+            student_index = np.searchsorted(student_ids, marks['student_id'])
+            credit_hours = np.bincount(student_index, weights=counted_credit, minlength=count)
+            grade_points = np.bincount(student_index, weights=weighted_points, minlength=count)
+
+            if self.semester:
+                in_term = marks['semester_id'] == int(self.semester)
+                term_credit_hours = np.bincount(student_index, weights=np.where(in_term, counted_credit, 0.0), minlength=count)
+                term_grade_points = np.bincount(student_index, weights=np.where(in_term, weighted_points, 0.0), minlength=count)
+
+        cgpa = np.divide(grade_points, credit_hours, out=np.zeros(count), where=credit_hours > 0)
+        ranks = self.rank(cgpa)
+        if self.semester:
+            term_gpa = np.divide(term_grade_points, term_credit_hours, out=np.zeros(count), where=term_credit_hours > 0)
+            term_ranks = self.rank(term_gpa)
+
+        results = []
+        for i, (student_id, username, first_name, middle_name, last_name) in enumerate(student_rows):
+            result = {
+                'student_id': student_id,
+                'username': username,
+                'name': ' '.join(name for name in (first_name, middle_name, last_name) if name),
+                'total_credit_hours': float(credit_hours[i]),
+                'average_cgpa': "{:.3f}".format(cgpa[i]),
+                'rank': int(ranks[i]),
+            }
+            if self.semester:
+                result['term_credit_hours'] = float(term_credit_hours[i])
+                result['term_gpa'] = "{:.3f}".format(term_gpa[i])
+                result['term_rank'] = int(term_ranks[i])
+            results.append(result)
+
+        results.sort(key=lambda result: (result['rank'], result['student_id']))
+        return results
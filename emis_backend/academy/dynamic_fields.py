@@ -0,0 +1,158 @@
+# academy/dynamic_fields.py
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_paths(value):
+    """
+        Turn 'id,course_offer.course.code,course_offer.semester' into a tree:
+        {'id': {}, 'course_offer': {'course': {'code': {}}, 'semester': {}}}
+    """
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class Shape:
+    """
+        The requested shape of a serializer: which fields to render (None = all of them)
+        and which nested relations to expand. Relations that are not expanded are rendered as primary keys.
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand or {}
+
+    @classmethod
+    def from_request(cls, request):
+        # only reads are shaped, writes always see every field
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return None
+        fields = parse_paths(params['fields']) if 'fields' in params else None
+        return cls(fields or None, parse_paths(params.get('expand')))
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def is_expanded(self, name):
+        # 'fields=course_offer.course.code' expands course_offer (and course) implicitly
+        return name in self.expand or bool(self.fields and self.fields.get(name))
+
+    def get_nested(self, name):
+        nested_fields = self.fields.get(name) if self.fields else None
+        return Shape(nested_fields or None, self.expand.get(name))
+
+
+class DynamicFieldsMixin:
+    """
+        Support '?fields=' and '?expand=' on GET for a ModelSerializer and its nested serializers:
+        - ?fields=id,course_offer.course.code renders only these fields (dotted paths reach into nested serializers).
+        - ?expand=course_offer.semester renders these nested relations; every other nested relation, and any
+          method field listed in Meta.expandable_fields, becomes its primary key (list of keys for many relations).
+        Without both parameters the serializer renders exactly as declared.
+        Use setup_eager_loading() to load only the relations the requested shape renders.
+    """
+
+    def get_shape(self):
+        if hasattr(self, '_shape'):
+            return self._shape
+        # the shape from the request belongs to the top level serializer (or the child of a top level list)
+        if self.root is self or getattr(self.root, 'child', None) is self:
+            return Shape.from_request(self.context.get('request'))
+        return None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        shape = self.get_shape()
+        if shape is None:
+            return fields
+
+        expandable_fields = getattr(self.Meta, 'expandable_fields', ())
+        shaped_fields = {}
+        for name, field in fields.items():
+            if not shape.includes(name):
+                continue
+
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if not isinstance(nested, serializers.BaseSerializer) and name not in expandable_fields:
+                shaped_fields[name] = field
+            elif shape.is_expanded(name):
+                if isinstance(nested, DynamicFieldsMixin):
+                    nested._shape = shape.get_nested(name)
+                shaped_fields[name] = field
+            else:
+                shaped_fields[name] = self.get_collapsed_field(name, field)
+        return shaped_fields
+
+    def get_collapsed_field(self, name, field):
+        # the field is not bound yet: its source is only set if it was given explicitly
+        source = field.source if field.source and field.source != '*' else name
+        try:
+            model_field = self.Meta.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return field
+        # DRF rejects a source equal to the field name
+        kwargs = {'read_only': True} if source == name else {'source': source, 'read_only': True}
+        if model_field.many_to_many or model_field.one_to_many:
+            return serializers.PrimaryKeyRelatedField(many=True, **kwargs)
+        return serializers.PrimaryKeyRelatedField(**kwargs)
+
+
+def get_related_lookups(serializer, model=None, prefix='', in_prefetch=False):
+    """
+        Walk the (shaped) fields of a serializer and return the (select_related, prefetch_related) lookups
+        needed to render it without a query per row.
+    """
+    select_related, prefetch_related = set(), set()
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    model = model or serializer.Meta.model
+
+    for name, field in serializer.fields.items():
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        nested = nested if isinstance(nested, serializers.ModelSerializer) else None
+        if field.source == '*' or '.' in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        lookup = prefix + field.source
+        is_many = model_field.many_to_many or model_field.one_to_many
+        if is_many or (nested and in_prefetch):
+            prefetch_related.add(lookup)
+        elif nested:
+            select_related.add(lookup)
+        # a forward foreign key rendered as its primary key needs no join
+
+        if nested:
+            nested_select, nested_prefetch = get_related_lookups(
+                nested, model_field.related_model, lookup + '__', in_prefetch or is_many
+            )
+            select_related |= nested_select
+            prefetch_related |= nested_prefetch
+    return select_related, prefetch_related
+
+
+def setup_eager_loading(queryset, serializer):
+    """
+        Add select_related/prefetch_related to the queryset for exactly the relations the serializer renders.
+    """
+    select_related, prefetch_related = get_related_lookups(serializer)
+    if select_related:
+        queryset = queryset.select_related(*sorted(select_related))
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*sorted(prefetch_related))
+    return queryset
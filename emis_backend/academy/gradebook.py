@@ -0,0 +1,183 @@
+# academy/gradebook.py
+
+import csv
+import io
+import numpy as np
+from django.db import transaction
+from django.db.models import F
+from .grading import calculate_total_marks, get_result_status, grade_band_index
+from .models import Marksheet, StudentAcademicSummary
+from .validators import Marksheet as ms
+
+
+MARK_FIELDS = list(ms.LIMITS)
+
+
+class GradebookError(Exception):
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} invalid row(s).')
+        self.errors = errors
+
+
+def parse_gradebook_csv(file):
+    """
+        Read an uploaded CSV gradebook into a list of row dicts.
+        Header: 'student' or 'marksheet' (id) followed by any of attendance, assignment, mid_term, final.
+    """
+    text = file.read()
+    if isinstance(text, bytes):
+        # utf-8-sig: spreadsheets often prepend a BOM
+        text = text.decode('utf-8-sig')
+    return [
+        {key.strip(): value.strip() if isinstance(value, str) else value for key, value in row.items() if key}
+        for row in csv.DictReader(io.StringIO(text))
+    ]
+
+
+def _parse_marks(rows):
+    """
+        Turn the rows into column arrays: values (NaN for null), given (the column was sent for the row) 
+        and invalid (not a number). A missing key or an empty CSV cell leaves the mark unchanged, a JSON null clears it.
+    """
+    count = len(rows)
+    values = np.full((count, len(MARK_FIELDS)), np.nan)
+    given = np.zeros((count, len(MARK_FIELDS)), dtype=bool)
+    invalid = np.zeros((count, len(MARK_FIELDS)), dtype=bool)
+
+    for i, row in enumerate(rows):
+        for j, field in enumerate(MARK_FIELDS):
+            if field not in row or row[field] == '':
+                continue
+            given[i, j] = True
+            value = row[field]
+            if value is None:
+                continue
+            try:
+                if isinstance(value, bool):
+                    raise TypeError
+                values[i, j] = float(value)
+            except (TypeError, ValueError):
+                invalid[i, j] = True
+            else:
+                invalid[i, j] = not np.isfinite(values[i, j])
+    return values, given, invalid
+
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def apply_gradebook(course_offer_id, rows):
+    """
+        Validate and apply the marks of a whole course offer in one transaction.
+
+        Each row identifies a marksheet of the offer by 'marksheet' id or by 'student' id.
+        All rows are checked against the mark limits (academy/validators.py, 0 to the maximum) at once with NumPy; 
+        if any row is invalid nothing is written and GradebookError carries a compact report:
+        [{'row': <1-based row number>, 'errors': {<field>: <message>}}].
+        Otherwise the marksheets are updated with one bulk_update and the number of updated marksheets is returned.
+    """
+    if not rows:
+        return 0
+
+    values, given, invalid = _parse_marks(rows)
+    limits = np.array([ms.LIMITS[field] for field in MARK_FIELDS], dtype=np.float64)
+    # NaN (null or not a number) is never out of range
+    exceeds = values > limits
+    negative = values < 0
+
+    with transaction.atomic():
+        marksheets = {
+            marksheet.id: marksheet
+            for marksheet in Marksheet.objects.select_for_update(of=('self',))
+            .filter(course_enrollment__course_offer_id=course_offer_id)
+            .annotate(student_id=F('course_enrollment__student_id'))
+            .only('id', 'course_enrollment_id', *MARK_FIELDS)
+        }
+        by_student = {marksheet.student_id: marksheet for marksheet in marksheets.values()}
+
+        errors = []
+        targets = []
+        seen = set()
+        for i, row in enumerate(rows):
+            row_errors = {}
+            if 'marksheet' in row and row['marksheet'] not in (None, ''):
+                marksheet = marksheets.get(_parse_id(row['marksheet']))
+            else:
+                marksheet = by_student.get(_parse_id(row.get('student')))
+
+            if marksheet is None:
+                row_errors['non_field_errors'] = 'No marksheet of this student in the course offer.'
+            elif marksheet.id in seen:
+                row_errors['non_field_errors'] = 'Duplicate row for this marksheet.'
+            else:
+                seen.add(marksheet.id)
+
+            for j in np.flatnonzero(invalid[i] | exceeds[i] | negative[i]):
+                field = MARK_FIELDS[j]
+                if invalid[i, j]:
+                    row_errors[field] = 'A valid number is required.'
+                else:
+                    row_errors[field] = ms.NEGATIVE_MESSAGE if negative[i, j] else ms.MESSAGES[field]
+
+            if row_errors:
+                errors.append({'row': i + 1, 'errors': row_errors})
+            else:
+                targets.append((i, marksheet))
+
+        if errors:
+            raise GradebookError(errors)
+
+        changed_fields = [field for j, field in enumerate(MARK_FIELDS) if given[:, j].any()]
+        for i, marksheet in targets:
+            for j, field in enumerate(MARK_FIELDS):
+                if given[i, j]:
+                    setattr(marksheet, field, None if np.isnan(values[i, j]) else float(values[i, j]))
+
+        updated = [marksheet for _, marksheet in targets]
+        if changed_fields:
+            Marksheet.objects.bulk_update(updated, changed_fields, batch_size=500)
+            # bulk_update does not send post_save, refresh the affected summaries here
+            StudentAcademicSummary.schedule_refresh({marksheet.student_id for marksheet in updated})
+
+    return len(updated)
+
+
+GRADEBOOK_COLUMNS = ['marksheet', 'student', 'username', 'name', *MARK_FIELDS, 'total', 'letter_grade', 'status']
+
+
+def get_gradebook_matrix(course_offer):
+    """
+        The marks of a course offer as parallel columns (one list per field, one position per marksheet), ordered by username.
+        One values_list() query; totals, letter grades and statuses are computed in memory with the grade band index.
+        Letter grades are None until the course offer is complete and for non-credit enrollments.
+    """
+    rows = Marksheet.objects.filter(course_enrollment__course_offer_id=course_offer.id).order_by(
+        'course_enrollment__student__user__username', 'id'
+    ).values_list(
+        'id', 'course_enrollment__student_id', 'course_enrollment__non_credit',
+        'course_enrollment__student__user__username', 'course_enrollment__student__user__first_name',
+        'course_enrollment__student__user__middle_name', 'course_enrollment__student__user__last_name',
+        *MARK_FIELDS,
+    )
+
+    grade_bands = grade_band_index.get_bands()
+    columns = {column: [] for column in GRADEBOOK_COLUMNS}
+    for marksheet_id, student_id, non_credit, username, first_name, middle_name, last_name, *values in rows:
+        marks = dict(zip(MARK_FIELDS, values))
+        total = calculate_total_marks(**marks)
+        grade_band = grade_bands.resolve(total) if course_offer.is_complete and not non_credit else None
+
+        columns['marksheet'].append(marksheet_id)
+        columns['student'].append(student_id)
+        columns['username'].append(username)
+        columns['name'].append(' '.join(name for name in (first_name, middle_name, last_name) if name))
+        for field in MARK_FIELDS:
+            columns[field].append(marks[field])
+        columns['total'].append(total)
+        columns['letter_grade'].append(grade_band.letter_grade if grade_band else None)
+        columns['status'].append(get_result_status(course_offer.is_complete, marks['assignment'], marks['mid_term'], marks['final']))
+    return columns
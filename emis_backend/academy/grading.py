@@ -0,0 +1,110 @@
+# academy/grading.py
+
+from bisect import bisect_right
+from collections import namedtuple
+import numpy as np
+from core.cache import reference_data_cache
+
+
+GradeBand = namedtuple('GradeBand', ['letter_grade', 'grade_point'])
+
+
+def calculate_total_marks(attendance, assignment, mid_term, final):
+    # Calculate the total marks, replacing None values with 0
+    return sum(mark for mark in (attendance, assignment, mid_term, final) if mark is not None)
+
+
+def get_result_status(is_complete, assignment, mid_term, final):
+    """
+        Result of a marksheet: 'on going' until the course offer is complete, 
+        then 'fail', 'retake', 'supplementary' or 'pass' by the first component below 40% of its maximum.
+    """
+    if not is_complete:
+        return 'on going'
+
+    # Calculate the pass marks for each component, replacing None values with 0
+    require_percentage = 0.4  # 40% required to pass
+    pass_marks_final = require_percentage * 40  # require_percentage of max marks for 'final': 40
+    pass_marks_mid_term = require_percentage * 30  # require_percentage of max marks for 'mid_term': 30
+    pass_marks_assignment = require_percentage * 20  # require_percentage of max marks for 'assignment': 20
+
+    assignment = assignment if assignment is not None else 0
+    mid_term = mid_term if mid_term is not None else 0
+    final = final if final is not None else 0
+
+    # Check the conditions for different statuses in reverse order
+    if assignment < pass_marks_assignment:
+        return 'fail'
+    elif mid_term < pass_marks_mid_term:
+        return 'retake'
+    elif final < pass_marks_final:
+        return 'supplementary'
+    return 'pass'
+
+
+# lowest grade point that earns the credit hours of a course
+MIN_COUNTED_GRADE_POINT = 2
+
+
+def is_counted(is_complete, non_credit, grade_point):
+    """
+        Whether a record counts for credit hours and CGPA: the course offer is complete, the enrollment is for credit
+        and the grade point is at least MIN_COUNTED_GRADE_POINT (NaN when no band matches).
+        The single rule of StudentAcademicSummary.compute() and CohortGPAEngine; takes scalars or NumPy arrays.
+    """
+    return np.logical_and(
+        np.logical_and(is_complete, np.logical_not(non_credit)),
+        np.nan_to_num(grade_point) >= MIN_COUNTED_GRADE_POINT,
+    )
+
+
+class GradeBands(namedtuple('GradeBands', ['lower_marks', 'higher_marks', 'bands'])):
+    """
+        The CGPATable as arrays sorted by lower_mark: total marks are resolved with a binary search instead of a query.
+    """
+
+    def resolve(self, total_marks):
+        """
+            Return the GradeBand whose [lower_mark, higher_mark] range contains total_marks, or None.
+        """
+        # the last band starting at or below total_marks is the only candidate
+        index = bisect_right(self.lower_marks, total_marks) - 1
+        if index < 0 or total_marks > self.higher_marks[index]:
+            return None
+        return self.bands[index]
+
+
+class GradeBandIndex:
+    """
+        Index of the CGPATable, kept in the reference data cache (core/cache.py) under 'grade_bands'.
+        The cache key is invalidated by saves/deletes of CGPATable (registered in academy/models.py).
+        get_bands() is a cache lookup (a round trip with a shared REFERENCE_DATA_CACHE): call it once per request 
+        or batch and resolve every mark with the returned GradeBands.
+    """
+
+    cache_key = 'grade_bands'
+
+    def _build(self):
+        from .models import CGPATable
+
+        rows = CGPATable.objects.order_by('lower_mark').values_list(
+            'lower_mark', 'higher_mark', 'letter_grade', 'grade_point'
+        )
+        lower_marks = []
+        higher_marks = []
+        bands = []
+        for lower_mark, higher_mark, letter_grade, grade_point in rows:
+            # marks are floats, compare them with the float value of the bounds (39.99 must match 39.99)
+            lower_marks.append(float(lower_mark))
+            higher_marks.append(float(higher_mark))
+            bands.append(GradeBand(letter_grade, grade_point))
+        return GradeBands(lower_marks, higher_marks, bands)
+
+    def get_bands(self):
+        """
+            Return the current GradeBands.
+        """
+        return reference_data_cache.get(self.cache_key, self._build)
+
+
+grade_band_index = GradeBandIndex()
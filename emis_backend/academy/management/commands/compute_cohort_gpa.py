@@ -0,0 +1,40 @@
+# academy/management/commands/compute_cohort_gpa.py
+
+import csv
+import time
+from django.core.management.base import BaseCommand, CommandError
+from academy.cohort import CohortGPAEngine
+
+
+class Command(BaseCommand):
+    help = "Compute credit hours, CGPA and rank (and term GPA with --semester) for a cohort and print them as CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', type=int)
+        parser.add_argument('--batch', type=int)
+        parser.add_argument('--program', type=int)
+        parser.add_argument('--semester', type=int)
+        parser.add_argument('--published-only', action='store_true', help='Count published marksheets only.')
+        parser.add_argument('--output', help='Write the CSV to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        filters = {key: options[key] for key in ('section', 'batch', 'program', 'semester') if options[key]}
+        if not filters:
+            raise CommandError('Provide at least one of --section, --batch, --program or --semester.')
+
+        started = time.perf_counter()
+        results = CohortGPAEngine(published_only=options['published_only'], **filters).compute()
+        elapsed = time.perf_counter() - started
+
+        fieldnames = list(results[0].keys()) if results else ['student_id']
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                writer = csv.DictWriter(output, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(results)
+        else:
+            writer = csv.DictWriter(self.stdout, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(results)
+
+        self.stderr.write(f'Computed {len(results)} student(s) in {elapsed:.3f}s.')
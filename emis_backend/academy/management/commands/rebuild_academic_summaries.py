@@ -0,0 +1,25 @@
+# academy/management/commands/rebuild_academic_summaries.py
+
+from django.core.management.base import BaseCommand
+from student.models import Student
+from academy.models import StudentAcademicSummary
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the StudentAcademicSummary rows (per semester and cumulative) from the marksheets. "
+        "Run it after changing the CGPATable or the credit of a course."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', type=int, action='append', dest='students', help='Rebuild only this student id (repeatable).')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Number of students refreshed per transaction.')
+
+    def handle(self, *args, **options):
+        student_ids = options['students'] or list(Student.objects.order_by('id').values_list('id', flat=True))
+        chunk_size = options['chunk_size']
+
+        for start in range(0, len(student_ids), chunk_size):
+            StudentAcademicSummary.refresh(student_ids[start:start + chunk_size])
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt academic summaries of {len(student_ids)} student(s).'))
@@ -0,0 +1,22 @@
+# academy/management/commands/rebuild_prerequisite_closure.py
+
+from django.core.management.base import BaseCommand
+from academy.models import CoursePrerequisiteClosure
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the CoursePrerequisiteClosure table from Course.prerequisites. "
+        "Run it once after creating the table; afterwards the closure is kept up to date on every change."
+    )
+
+    def handle(self, *args, **options):
+        CoursePrerequisiteClosure.rebuild()
+        pairs = set(CoursePrerequisiteClosure.objects.values_list('course_id', 'prerequisite_id'))
+
+        # cycles that existed before the closure table rejected them have to be fixed by hand
+        cyclic = sorted({course_id for course_id, prerequisite_id in pairs if (prerequisite_id, course_id) in pairs})
+        if cyclic:
+            self.stdout.write(self.style.WARNING(f'Courses in a prerequisite cycle: {cyclic}'))
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(pairs)} closure row(s).'))
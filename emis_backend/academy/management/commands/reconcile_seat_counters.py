@@ -0,0 +1,49 @@
+# academy/management/commands/reconcile_seat_counters.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from academy.models import Section, StudentEnrollment, CourseOffer, CourseEnrollment
+from core.cache import reference_data_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the enrollments of every section and course offer and fix "
+        "Section.enrolled_count / CourseOffer.enrolled_count where they drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the counters that are out of sync.')
+
+    def handle(self, *args, **options):
+        self.reconcile(Section, StudentEnrollment, 'batch_section_id', options['dry_run'])
+        self.reconcile(CourseOffer, CourseEnrollment, 'course_offer_id', options['dry_run'])
+
+    def reconcile(self, model, enrollment_model, enrollment_field, dry_run):
+        fixed = 0
+        with transaction.atomic():
+            # lock the counters so that concurrent enrollments wait for the recount
+            counters = list(model.objects.select_for_update().order_by('id'))
+            counts = dict(
+                enrollment_model.objects.filter(**{f'{enrollment_field}__isnull': False})
+                .values_list(enrollment_field)
+                .annotate(count=Count('id'))
+                .values_list(enrollment_field, 'count')
+            )
+
+            out_of_sync = []
+            for counter in counters:
+                actual = counts.get(counter.id, 0)
+                if counter.enrolled_count != actual:
+                    self.stdout.write(f'{model.__name__} {counter.id} ({counter}): enrolled_count {counter.enrolled_count} -> {actual}')
+                    counter.enrolled_count = actual
+                    out_of_sync.append(counter)
+
+            if out_of_sync and not dry_run:
+                model.objects.bulk_update(out_of_sync, ['enrolled_count'], batch_size=500)
+                fixed = len(out_of_sync)
+                if model is Section:
+                    reference_data_cache.invalidate('batches')
+
+        self.stdout.write(self.style.SUCCESS(f'{model.__name__}: checked {len(counters)}, fixed {fixed}.'))
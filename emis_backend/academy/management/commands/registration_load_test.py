@@ -0,0 +1,102 @@
+# academy/management/commands/registration_load_test.py
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from student.models import Student
+from academy.models import TermChoices, Semester, Course, CourseOffer, CourseEnrollment
+from academy.registration import RegistrationError, register_student
+from core.benchmarking import format_latencies
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the course registration path: many students register concurrently for one popular course offer. "
+        "Reports throughput and checks that the offer is never overbooked. "
+        "Creates throwaway students/course/semester/offer and deletes them afterwards. "
+        "Run it against a disposable PostgreSQL database (SQLite serializes all writes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000, help='Number of students trying to register.')
+        parser.add_argument('--capacity', type=int, default=150, help='Capacity of the course offer.')
+        parser.add_argument('--threads', type=int, default=32, help='Number of concurrent workers.')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated data.')
+
+    def handle(self, *args, **options):
+        if options['capacity'] < 1:
+            raise CommandError('--capacity must be at least 1.')
+        if connection.vendor != 'postgresql':
+            self.stderr.write(self.style.WARNING(f'Running on {connection.vendor}: row locks are not exercised, numbers are not representative.'))
+
+        tag = uuid.uuid4().hex[:8]
+        student_ids, course_offer = self.create_fixtures(tag, options['students'], options['capacity'])
+        try:
+            outcomes, latencies, elapsed = self.run(student_ids, course_offer.id, options['threads'])
+            self.report(course_offer, outcomes, latencies, elapsed)
+        finally:
+            if not options['keep']:
+                self.cleanup(student_ids, course_offer)
+
+    def create_fixtures(self, tag, student_count, capacity):
+        students = Student.objects.bulk_create([Student(nid=f'lt{tag}{i}') for i in range(student_count)])
+        student_ids = [student.id for student in students] or list(
+            Student.objects.filter(nid__startswith=f'lt{tag}').values_list('id', flat=True)
+        )
+
+        # semester codes/years are unique, derive throwaway ones from the tag
+        code = int(tag, 16) % 2_000_000_000
+        term = TermChoices.objects.create(name=f'Load test {tag}')
+        semester = Semester.objects.create(term=term, year=code, code=code, is_open=True)
+        course = Course.objects.create(name=f'Load test {tag}', acronym=f'LT{tag[:6]}', code=code, credit=3.0)
+        course_offer = CourseOffer.objects.create(semester=semester, course=course, capacity=capacity)
+        return student_ids, course_offer
+
+    def run(self, student_ids, course_offer_id, threads):
+        def attempt(student_id):
+            started = time.perf_counter()
+            try:
+                register_student(student_id, course_offer_id)
+                outcome = 'enrolled'
+            except RegistrationError as e:
+                outcome = 'full' if e.status_code == 409 else 'rejected'
+            except Exception as e:
+                outcome = f'error: {type(e).__name__}'
+            finally:
+                # every worker thread opens its own connection, do not leak them
+                connections.close_all()
+            return outcome, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(attempt, student_ids))
+        elapsed = time.perf_counter() - started
+
+        outcomes = Counter(outcome for outcome, _ in results)
+        latencies = sorted(latency for _, latency in results)
+        return outcomes, latencies, elapsed
+
+    def report(self, course_offer, outcomes, latencies, elapsed):
+        course_offer.refresh_from_db()
+        enrolled = CourseEnrollment.objects.filter(course_offer=course_offer).count()
+        overbooked = max(enrolled - course_offer.capacity, 0)
+
+        self.stdout.write(f'Attempts:        {sum(outcomes.values())} in {elapsed:.2f}s ({sum(outcomes.values()) / elapsed:.0f} req/s)')
+        self.stdout.write(f'Outcomes:        {dict(outcomes)}')
+        self.stdout.write(f'Latency:         {format_latencies(latencies, precision=1)}')
+        self.stdout.write(f'Capacity:        {course_offer.capacity}, enrolled rows: {enrolled}, counter: {course_offer.enrolled_count}')
+
+        if overbooked or enrolled != course_offer.enrolled_count:
+            self.stdout.write(self.style.ERROR(f'FAILED: overbooked by {overbooked}, counter drift {course_offer.enrolled_count - enrolled}.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('OK: no overbooking, counter matches the enrollments.'))
+
+    def cleanup(self, student_ids, course_offer):
+        semester_id, course_id = course_offer.semester_id, course_offer.course_id
+        Student.objects.filter(id__in=student_ids).delete()
+        course_offer.delete()
+        Course.objects.filter(id=course_id).delete()
+        TermChoices.objects.filter(semester__id=semester_id).delete()
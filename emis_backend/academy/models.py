@@ -1,15 +1,19 @@
 # academy/models.py
 
-from django.db import models
+from collections import defaultdict
+from django.db import models, transaction
 from django.apps import AppConfig
 from django.contrib.contenttypes.fields import GenericRelation  
-from django.db.models.signals import post_migrate
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_migrate, pre_save, post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver 
 from authentication.models import User
 from comments.models import Comment
+from core.cache import get_profile_key, reference_data_cache
 from teacher.models import Teacher
 from student.models import Student
 from academy.validators import Marksheet as ms 
+from academy.grading import calculate_total_marks, grade_band_index, is_counted
 
 from rest_framework import status
 from rest_framework.response import Response
@@ -145,6 +149,99 @@ class Course(models.Model):
 
     class Meta:
         unique_together = ['acronym', 'code', 'credit']
+
+
+class PrerequisiteCycle(Exception):
+    """
+        Raised when an added prerequisite would make a course (indirectly) its own prerequisite.
+    """
+#####################################################################
+
+
+#####################################################################
+##################### CoursePrerequisiteClosure:
+#####################   - dependent on: Course.
+#####################   Transitive closure of Course.prerequisites: one row per (course, direct or indirect prerequisite),
+#####################   depth = length of the shortest prerequisite chain (1 = direct prerequisite).
+#####################   linked with: update_prerequisite_closure_*() receivers.
+class CoursePrerequisiteClosure(models.Model):
+    course = models.ForeignKey(Course, related_name='prerequisite_closure', on_delete=models.CASCADE)
+    prerequisite = models.ForeignKey(Course, related_name='+', on_delete=models.CASCADE)
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ['course', 'prerequisite']
+
+    def __str__(self):
+        return f'{self.course} requires {self.prerequisite} (depth {self.depth})'
+
+    @staticmethod
+    def get_edges():
+        # every direct prerequisite edge, {course_id: [prerequisite_id, ...]}
+        edges = defaultdict(list)
+        for course_id, prerequisite_id in Course.prerequisites.through.objects.values_list('from_course_id', 'to_course_id'):
+            edges[course_id].append(prerequisite_id)
+        return edges
+
+    @classmethod
+    def get_dependents(cls, course_ids):
+        # courses that have any of the given courses as a direct or indirect prerequisite
+        return set(cls.objects.filter(prerequisite_id__in=course_ids).values_list('course_id', flat=True))
+
+    @classmethod
+    def rebuild(cls, course_ids=None):
+        """
+            Recompute the closure rows of the given courses and of every course depending on them 
+            (all courses if course_ids is None) with a breadth-first walk of the prerequisite edges.
+        """
+        with transaction.atomic():
+            edges = cls.get_edges()
+            if course_ids is None:
+                affected = set(Course.objects.values_list('id', flat=True))
+                cls.objects.all().delete()
+            else:
+                affected = set(course_ids) | cls.get_dependents(course_ids)
+                cls.objects.filter(course_id__in=affected).delete()
+
+            rows = []
+            for course_id in affected:
+                depths = {course_id: 0}
+                frontier = [course_id]
+                while frontier:
+                    next_frontier = []
+                    for current in frontier:
+                        for prerequisite_id in edges.get(current, ()):
+                            if prerequisite_id not in depths:
+                                depths[prerequisite_id] = depths[current] + 1
+                                next_frontier.append(prerequisite_id)
+                    frontier = next_frontier
+                del depths[course_id]
+                rows.extend(cls(course_id=course_id, prerequisite_id=prerequisite_id, depth=depth) for prerequisite_id, depth in depths.items())
+            cls.objects.bulk_create(rows, batch_size=1000)
+
+    @classmethod
+    def creates_cycle(cls, course_id, prerequisite_ids):
+        # course -> prerequisite closes a cycle if the course already is (or is) a prerequisite of the prerequisite
+        prerequisite_ids = set(prerequisite_ids)
+        if course_id in prerequisite_ids:
+            return True
+        return cls.objects.filter(course_id__in=prerequisite_ids, prerequisite_id=course_id).exists()
+
+    @classmethod
+    def get_graph(cls, course_id):
+        """
+            Return (prerequisite_ids, edges) of the whole prerequisite tree of a course with two queries: 
+            the closure rows of the course and the direct edges between those courses.
+        """
+        prerequisite_ids = set(cls.objects.filter(course_id=course_id).values_list('prerequisite_id', flat=True))
+        edges = defaultdict(list)
+        if prerequisite_ids:
+            through = Course.prerequisites.through.objects.filter(
+                from_course_id__in=prerequisite_ids | {course_id}, to_course_id__in=prerequisite_ids
+            ).order_by('id')
+            for from_course_id, to_course_id in through.values_list('from_course_id', 'to_course_id'):
+                edges[from_course_id].append(to_course_id)
+        return prerequisite_ids, edges
 #####################################################################
 
 
@@ -185,6 +282,10 @@ class Section(models.Model):
     name = models.CharField(max_length=50)
     batch = models.ForeignKey(Batch, on_delete=models.CASCADE, related_name='sections')
     max_seats = models.PositiveIntegerField(default=10)
+    # Number of StudentEnrollment rows in this section. 
+    # Maintained by StudentEnrollment.save() and update_section_enrolled_count_on_delete(); 
+    # fix drift with 'manage.py reconcile_seat_counters'.
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f'{self.batch}: Section {self.name}'
@@ -192,9 +293,25 @@ class Section(models.Model):
     class Meta:
         unique_together = ['name', 'batch']
 
+    def save(self, *args, **kwargs):
+        # enrolled_count is only changed with F() updates, never written back from a (possibly stale) instance
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields if not field.primary_key and field.name != 'enrolled_count']
+        super().save(*args, **kwargs)
+
     def get_available_seats(self):
-        enrolled_count = StudentEnrollment.objects.filter(batch_section=self).count()
-        return self.max_seats - enrolled_count
+        return self.max_seats - self.enrolled_count
+
+    @staticmethod
+    def adjust_enrolled_count(section_id, delta):
+        # Atomic in-database increment/decrement, safe under concurrent enrollments 
+        if section_id is None or not delta:
+            return
+        sections = Section.objects.filter(pk=section_id)
+        if delta < 0:
+            sections = sections.filter(enrolled_count__gte=-delta)
+        if sections.update(enrolled_count=models.F('enrolled_count') + delta):
+            reference_data_cache.invalidate('batches')
 #####################################################################
 
 
@@ -220,6 +337,19 @@ class StudentEnrollment(models.Model):
 
     def __str__(self):
         return f'Student Enrollment: {self.student} - {self.batch_section}'
+
+    def save(self, *args, **kwargs):
+        # Keep Section.enrolled_count in step with the enrollment (created or moved) in the same transaction
+        with transaction.atomic():
+            previous_section_id = None
+            if not self._state.adding:
+                previous_section_id = (
+                    StudentEnrollment.objects.select_for_update().filter(pk=self.pk).values_list('batch_section_id', flat=True).first()
+                )
+            super().save(*args, **kwargs)
+            if previous_section_id != self.batch_section_id:
+                Section.adjust_enrolled_count(previous_section_id, -1)
+                Section.adjust_enrolled_count(self.batch_section_id, 1)
 #####################################################################
 
 
@@ -230,15 +360,52 @@ class CourseOffer(models.Model):
     semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     teacher = models.ForeignKey(Teacher, on_delete=models.SET_NULL, null=True)
-    capacity = models.PositiveIntegerField(default=0)
+    capacity = models.PositiveIntegerField(default=0)  # 0 means no limit
     is_complete = models.BooleanField(default=False)
     comments = GenericRelation(Comment)  # This sets up the reverse relationship with comments
+    # Number of CourseEnrollment rows of this offer. 
+    # Maintained by CourseEnrollment.save() and update_course_offer_enrolled_count_on_delete(); 
+    # fix drift with 'manage.py reconcile_seat_counters'.
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         unique_together = ['semester', 'course', 'teacher']
 
     def __str__(self):
         return f'{self.course} - {self.semester} - {self.teacher}'
+
+    def save(self, *args, **kwargs):
+        # enrolled_count is only changed with F() updates, never written back from a (possibly stale) instance
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields if not field.primary_key and field.name != 'enrolled_count']
+        super().save(*args, **kwargs)
+
+    def get_available_seats(self):
+        if not self.capacity:
+            return None
+        return max(self.capacity - self.enrolled_count, 0)
+
+    @staticmethod
+    def reserve_seats(course_offer_id, count=1):
+        """
+            Atomically take 'count' seats of the offer. Returns False (and changes nothing) if they do not fit.
+            A single conditional UPDATE: no read-then-write race and the row lock is held only until commit.
+        """
+        fits = models.Q(capacity=0) | models.Q(enrolled_count__lte=models.F('capacity') - count)
+        updated = CourseOffer.objects.filter(fits, pk=course_offer_id).update(enrolled_count=models.F('enrolled_count') + count)
+        return updated == 1
+
+    @staticmethod
+    def release_seats(course_offer_id, count=1):
+        if course_offer_id is None:
+            return
+        CourseOffer.objects.filter(pk=course_offer_id, enrolled_count__gte=count).update(enrolled_count=models.F('enrolled_count') - count)
+
+
+class NoSeatsAvailable(Exception):
+    """
+        Raised when a course enrollment does not fit into the capacity of its CourseOffer.
+    """
 #####################################################################
 
 
@@ -256,6 +423,21 @@ class CourseEnrollment(models.Model):
 
     def __str__(self):
         return f'Course Enrollment: {self.course_offer} - {self.student}'
+
+    def save(self, *args, **kwargs):
+        # Take a seat of the course offer (created or moved) in the same transaction, raise NoSeatsAvailable if it is full
+        with transaction.atomic():
+            previous_course_offer_id = None
+            if not self._state.adding:
+                previous_course_offer_id = (
+                    CourseEnrollment.objects.select_for_update().filter(pk=self.pk).values_list('course_offer_id', flat=True).first()
+                )
+            super().save(*args, **kwargs)
+            if previous_course_offer_id != self.course_offer_id:
+                # reserve last: the popular offer's row stays locked only for the rest of the transaction 
+                CourseOffer.release_seats(previous_course_offer_id)
+                if not CourseOffer.reserve_seats(self.course_offer_id):
+                    raise NoSeatsAvailable('No seats available in this course offer.')
 #####################################################################
 
 
@@ -289,6 +471,304 @@ class Marksheet(models.Model):
 #####################################################################
 
 
+#####################################################################
+##################### StudentAcademicSummary:
+#####################   - dependent on: Student, Semester, Marksheet.
+#####################   semester=None holds the cumulative (whole transcript) summary of the student.
+#####################   linked with: refresh_academic_summary_*() receivers.
+class StudentAcademicSummary(models.Model):
+    student = models.ForeignKey(Student, related_name='academic_summaries', on_delete=models.CASCADE)
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, blank=True, null=True)
+    # all records (as seen by staff) 
+    credit_hours = models.FloatField(default=0)
+    grade_points = models.FloatField(default=0)
+    # published records only (as seen by the student) 
+    published_credit_hours = models.FloatField(default=0)
+    published_grade_points = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['student', 'semester']
+        constraints = [
+            models.UniqueConstraint(fields=['student'], condition=models.Q(semester__isnull=True), name='unique_cumulative_academic_summary'),
+        ]
+
+    def __str__(self):
+        return f'Academic Summary: {self.student_id} - {self.semester or "cumulative"}'
+
+    def get_credit_hours(self, published_only=False):
+        return self.published_credit_hours if published_only else self.credit_hours
+
+    def get_cgpa(self, published_only=False):
+        credit_hours = self.get_credit_hours(published_only)
+        grade_points = self.published_grade_points if published_only else self.grade_points
+        return grade_points / credit_hours if credit_hours > 0 else 0.0
+
+    @classmethod
+    def compute(cls, student_ids):
+        """
+            Compute the per-semester and cumulative summaries of the given students from their marksheets,
+            as unsaved instances (read-only).
+            Counts the records chosen by academy.grading.is_counted(), like CohortGPAEngine.
+        """
+        records = Marksheet.objects.filter(course_enrollment__student_id__in=student_ids).values_list(
+            'course_enrollment__student_id',
+            'course_enrollment__course_offer__semester_id',
+            'course_enrollment__course_offer__course__credit',
+            'course_enrollment__course_offer__is_complete',
+            'course_enrollment__non_credit',
+            'is_published',
+            'attendance', 'assignment', 'mid_term', 'final',
+        )
+
+        # (student_id, semester_id or None) -> [credit_hours, grade_points, published_credit_hours, published_grade_points]
+        grade_bands = grade_band_index.get_bands()
+        totals = defaultdict(lambda: [0.0, 0.0, 0.0, 0.0])
+        for student_id in student_ids:
+            totals[(student_id, None)]
+        for student_id, semester_id, credit, is_complete, non_credit, is_published, *marks in records:
+            semester_totals = totals[(student_id, semester_id)]
+            grade_band = grade_bands.resolve(calculate_total_marks(*marks))
+            grade_point = float(grade_band.grade_point) if grade_band else float('nan')
+            if not is_counted(is_complete, non_credit, grade_point):
+                continue
+            grade_points = grade_point * credit
+            for summary_totals in (semester_totals, totals[(student_id, None)]):
+                summary_totals[0] += credit
+                summary_totals[1] += grade_points
+                if is_published:
+                    summary_totals[2] += credit
+                    summary_totals[3] += grade_points
+
+        return [
+            cls(
+                student_id=student_id,
+                semester_id=semester_id,
+                credit_hours=summary_totals[0],
+                grade_points=summary_totals[1],
+                published_credit_hours=summary_totals[2],
+                published_grade_points=summary_totals[3],
+            )
+            for (student_id, semester_id), summary_totals in totals.items()
+        ]
+
+    @classmethod
+    def refresh(cls, student_ids):
+        """
+            Recompute and store the per-semester and cumulative summaries of the given students.
+        """
+        student_ids = sorted(set(student_ids))
+        if not student_ids:
+            return
+
+        summaries = cls.compute(student_ids)
+        with transaction.atomic():
+            # lock the students so that concurrent refreshes of the same student are applied one after another
+            existing_student_ids = set(
+                Student.objects.select_for_update().filter(id__in=student_ids).order_by('id').values_list('id', flat=True)
+            )
+            cls.objects.filter(student_id__in=student_ids).delete()
+            cls.objects.bulk_create([summary for summary in summaries if summary.student_id in existing_student_ids])
+
+    @classmethod
+    def schedule_refresh(cls, student_ids):
+        """
+            Refresh once the current transaction commits (immediately in autocommit mode), 
+            so that cascading deletes and bulk writes are complete before the summaries are rebuilt.
+        """
+        student_ids = list(student_ids)
+        if student_ids:
+            transaction.on_commit(lambda: cls.refresh(student_ids))
+
+    @classmethod
+    def get_summary(cls, student_id, semester_id=None):
+        """
+            Return the summary of a student for a semester, or the cumulative one (semester_id None); None if there is none.
+            Read-only: summaries that are not built yet (e.g. records that predate the summary table) are computed,
+            not stored. They are stored by schedule_refresh() and 'manage.py rebuild_academic_summaries'.
+        """
+        summary = cls.objects.filter(student_id=student_id, semester_id=semester_id).first()
+        # the cumulative summary exists once the student has been refreshed, without it nothing is built yet
+        if summary is None and not cls.objects.filter(student_id=student_id, semester__isnull=True).exists():
+            summary = next((summary for summary in cls.compute([student_id]) if summary.semester_id == semester_id), None)
+        return summary
+#####################################################################
+
+
+#####################################################################
+##################### reference_data_cache:
+#####################   - dependent on: Designation, TermChoices, Institute, Department, DegreeType, Program, Semester, Course,
+#####################     Batch, Section, StudentEnrollment, TeacherEnrollment, CGPATable.
+#####################   Cached catalog data and ETag versions (core/cache.py) and the models whose changes invalidate them.
+#####################   linked with: the catalog APIViews, the profile views, academy.grading.grade_band_index
+#####################   and academy.semesters.current_semesters.
+reference_data_cache.register('designations', Designation)
+reference_data_cache.register('term_choices', TermChoices)
+reference_data_cache.register('institutes', Institute)
+reference_data_cache.register('departments', Department, Institute, Program)
+reference_data_cache.register('degree_types', DegreeType)
+reference_data_cache.register('programs', Program)
+reference_data_cache.register('programs_nested', Program, DegreeType, Department)
+reference_data_cache.register('semesters', Semester, TermChoices, Semester.programs.through)
+reference_data_cache.register('current_semesters', Semester, TermChoices, Semester.programs.through)
+reference_data_cache.register(
+    'courses', Course, Program, DegreeType, Department, Course.programs.through, Course.prerequisites.through
+)
+# Section.enrolled_count is changed by update(), see Section.adjust_enrolled_count()
+reference_data_cache.register('batches', Batch, Section, Program, DegreeType, Department)
+reference_data_cache.register(grade_band_index.cache_key, CGPATable)
+
+
+def get_enrollment_profile_key(instance):
+    # the enrollment is part of the student/teacher profile
+    if isinstance(instance, StudentEnrollment):
+        return get_profile_key(instance.student.user_id)
+    if isinstance(instance, TeacherEnrollment):
+        return get_profile_key(instance.teacher.user_id)
+    return None  # reverse m2m changes, e.g. department.teacherenrollment_set.add()
+
+reference_data_cache.register(
+    get_enrollment_profile_key, StudentEnrollment, TeacherEnrollment,
+    TeacherEnrollment.designations.through, TeacherEnrollment.departments.through
+)
+#####################################################################
+
+
+#####################################################################
+##################### update_section_enrolled_count_on_delete:
+#####################   - dependent on: Section, StudentEnrollment.
+#####################   Deletes (including cascades) run inside the deletion transaction.
+@receiver(post_delete, sender=StudentEnrollment)
+def update_section_enrolled_count_on_delete(sender, instance, **kwargs):
+    Section.adjust_enrolled_count(instance.batch_section_id, -1)
+#####################################################################
+
+
+#####################################################################
+##################### update_course_offer_enrolled_count_on_delete:
+#####################   - dependent on: CourseOffer, CourseEnrollment.
+@receiver(post_delete, sender=CourseEnrollment)
+def update_course_offer_enrolled_count_on_delete(sender, instance, **kwargs):
+    CourseOffer.release_seats(instance.course_offer_id)
+#####################################################################
+
+
+#####################################################################
+##################### refresh_academic_summary_*:
+#####################   - dependent on: StudentAcademicSummary, Marksheet, CourseOffer, CourseEnrollment, CGPATable, Course.
+#####################   Keep the summaries in step with marks, CourseOffer.is_complete, CourseEnrollment.non_credit,
+#####################   the CGPATable bands and Course.credit; only the affected students are refreshed.
+@receiver([post_save, post_delete], sender=Marksheet)
+def refresh_academic_summary_on_marksheet(sender, instance, created=False, **kwargs):
+    # the empty marksheet of every registration adds nothing to a summary
+    if created and all(mark is None for mark in (instance.attendance, instance.assignment, instance.mid_term, instance.final)):
+        return
+    student_id = CourseEnrollment.objects.filter(pk=instance.course_enrollment_id).values_list('student_id', flat=True).first()
+    if student_id is not None:
+        StudentAcademicSummary.schedule_refresh([student_id])
+
+
+@receiver(pre_save, sender=CourseOffer)
+def track_course_offer_completion(sender, instance, **kwargs):
+    previous = CourseOffer.objects.filter(pk=instance.pk).values_list('is_complete', flat=True).first() if instance.pk else None
+    instance._completion_changed = previous is not None and previous != instance.is_complete
+
+
+@receiver(post_save, sender=CourseOffer)
+def refresh_academic_summary_on_course_offer(sender, instance, **kwargs):
+    if getattr(instance, '_completion_changed', False):
+        StudentAcademicSummary.schedule_refresh(
+            CourseEnrollment.objects.filter(course_offer=instance).values_list('student_id', flat=True)
+        )
+
+
+@receiver(pre_save, sender=CourseEnrollment)
+def track_course_enrollment_non_credit(sender, instance, **kwargs):
+    previous = CourseEnrollment.objects.filter(pk=instance.pk).values_list('non_credit', flat=True).first() if instance.pk else None
+    instance._non_credit_changed = previous is not None and previous != instance.non_credit
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def refresh_academic_summary_on_course_enrollment(sender, instance, **kwargs):
+    if getattr(instance, '_non_credit_changed', False):
+        StudentAcademicSummary.schedule_refresh([instance.student_id])
+
+
+@receiver(post_delete, sender=CourseEnrollment)
+def refresh_academic_summary_on_course_enrollment_delete(sender, instance, **kwargs):
+    StudentAcademicSummary.schedule_refresh([instance.student_id])
+
+
+@receiver(pre_save, sender=CGPATable)
+def track_cgpa_table_band(sender, instance, **kwargs):
+    instance._previous_band = (
+        CGPATable.objects.filter(pk=instance.pk).values_list('lower_mark', 'higher_mark').first() if instance.pk else None
+    )
+
+
+@receiver([post_save, post_delete], sender=CGPATable)
+def refresh_academic_summary_on_cgpa_table(sender, instance, **kwargs):
+    # the students with a counted record whose total marks fall into the old or the new band
+    bands = [(instance.lower_mark, instance.higher_mark), getattr(instance, '_previous_band', None)]
+    in_bands = models.Q()
+    for lower_mark, higher_mark in filter(None, bands):
+        in_bands |= models.Q(total_marks__gte=float(lower_mark), total_marks__lte=float(higher_mark))
+    StudentAcademicSummary.schedule_refresh(
+        Marksheet.objects.filter(course_enrollment__course_offer__is_complete=True, course_enrollment__non_credit=False)
+        .annotate(total_marks=Coalesce('attendance', 0.0) + Coalesce('assignment', 0.0) + Coalesce('mid_term', 0.0) + Coalesce('final', 0.0))
+        .filter(in_bands)
+        .values_list('course_enrollment__student_id', flat=True)
+        .distinct()
+    )
+
+
+@receiver(pre_save, sender=Course)
+def track_course_credit(sender, instance, **kwargs):
+    previous = Course.objects.filter(pk=instance.pk).values_list('credit', flat=True).first() if instance.pk else None
+    instance._credit_changed = previous is not None and previous != instance.credit
+
+
+@receiver(post_save, sender=Course)
+def refresh_academic_summary_on_course(sender, instance, **kwargs):
+    if getattr(instance, '_credit_changed', False):
+        StudentAcademicSummary.schedule_refresh(
+            CourseEnrollment.objects.filter(course_offer__course=instance).values_list('student_id', flat=True).distinct()
+        )
+#####################################################################
+
+
+#####################################################################
+##################### update_prerequisite_closure_*:
+#####################   - dependent on: Course, CoursePrerequisiteClosure.
+#####################   Reject added prerequisites that close a cycle (every write path goes through add()/set()), 
+#####################   and rebuild the closure of the changed courses.
+@receiver(m2m_changed, sender=Course.prerequisites.through)
+def update_prerequisite_closure_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_add' and pk_set:
+        edges = [(course_id, {instance.pk}) for course_id in pk_set] if reverse else [(instance.pk, pk_set)]
+        if any(CoursePrerequisiteClosure.creates_cycle(course_id, prerequisite_ids) for course_id, prerequisite_ids in edges):
+            raise PrerequisiteCycle('These prerequisites would create a cycle.')
+
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        course_ids = pk_set if reverse else {instance.pk}
+        if course_ids:
+            CoursePrerequisiteClosure.rebuild(course_ids)
+
+
+@receiver(pre_delete, sender=Course)
+def track_prerequisite_dependents(sender, instance, **kwargs):
+    instance._prerequisite_dependents = CoursePrerequisiteClosure.get_dependents([instance.pk])
+
+
+@receiver(post_delete, sender=Course)
+def update_prerequisite_closure_on_delete(sender, instance, **kwargs):
+    # the prerequisite edges of the course are deleted with it, without m2m_changed 
+    dependents = getattr(instance, '_prerequisite_dependents', None)
+    if dependents:
+        CoursePrerequisiteClosure.rebuild(dependents)
+#####################################################################
+
+
 
 
 
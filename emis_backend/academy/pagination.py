@@ -0,0 +1,39 @@
+# academy/pagination.py
+
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from .dynamic_fields import setup_eager_loading
+
+
+class OptionalCursorPagination(CursorPagination):
+    """
+        Keyset (cursor) pagination on the primary key, only used when the client asks for it 
+        with ?cursor= or ?page_size=; without them the full list is returned as before.
+        Each page is a "WHERE id > <last id> ORDER BY id LIMIT n" query, so its cost does not grow with the table.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def is_requested(self, request):
+        return self.cursor_query_param in request.query_params or self.page_size_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view=view)
+
+
+def get_list_response(view, request, queryset, serializer_class):
+    """
+        List response for APIView based endpoints: a cursor page if requested, the whole queryset otherwise.
+        The relations are loaded for the shape requested with ?fields=/?expand= (see academy/dynamic_fields.py).
+    """
+    context = {'request': request, 'view': view}
+    queryset = setup_eager_loading(queryset, serializer_class(many=True, context=context))
+
+    paginator = OptionalCursorPagination()
+    page = paginator.paginate_queryset(queryset, request, view=view)
+    if page is None:
+        return Response(serializer_class(queryset, many=True, context=context).data)
+    return paginator.get_paginated_response(serializer_class(page, many=True, context=context).data)
@@ -0,0 +1,264 @@
+# academy/registration.py
+
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from student.models import Student
+from .grading import get_result_status
+from .models import CourseOffer, CourseEnrollment, CoursePrerequisiteClosure, Marksheet, NoSeatsAvailable, StudentAcademicSummary
+
+
+class RegistrationError(Exception):
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def register_student(student_id, course_offer_id, regular=True, non_credit=False):
+    """
+        Enroll a student into a course offer and create the marksheet, in one transaction.
+
+        - The student row is locked, so the regular/non-credit rules below are checked and applied 
+          without racing other registrations of the same student. 
+        - The seat is taken by CourseEnrollment.save() with a conditional UPDATE on the offer (no overbooking), 
+          as the last write, so the hot row of a popular offer is locked as briefly as possible.
+        Raises RegistrationError with the message and HTTP status to return.
+    """
+    with transaction.atomic():
+        if Student.objects.select_for_update().filter(pk=student_id).values_list('id', flat=True).first() is None:
+            raise RegistrationError('Student not found.', status.HTTP_404_NOT_FOUND)
+
+        course_offer = CourseOffer.objects.filter(pk=course_offer_id).only('id', 'course_id').first()
+        if course_offer is None:
+            raise RegistrationError('CourseOffer not found.', status.HTTP_404_NOT_FOUND)
+
+        # Check if the student has a previous enrollment with regular=True for the same course.
+        previous_enrollments = CourseEnrollment.objects.filter(
+            student_id=student_id,
+            course_offer__course_id=course_offer.course_id,
+            regular=True
+        )
+        has_previous_enrollments = previous_enrollments.exists()
+
+        if regular and has_previous_enrollments:
+            raise RegistrationError("Student already enrolled in this course as 'regular course'.")
+
+        if not regular and has_previous_enrollments:
+            # A retake: previous enrollments of the course no longer count for credit.
+            previous_enrollments.update(non_credit=True)
+            StudentAcademicSummary.schedule_refresh([student_id])
+
+        course_enrollment = CourseEnrollment(
+            course_offer_id=course_offer_id,
+            student_id=student_id,
+            regular=regular,
+            non_credit=non_credit,
+        )
+        try:
+            # savepoint, so a duplicate does not break the outer transaction 
+            with transaction.atomic():
+                course_enrollment.save()
+        except IntegrityError:
+            raise RegistrationError('Student already enrolled in this course offer.')
+        except NoSeatsAvailable as e:
+            raise RegistrationError(str(e), status.HTTP_409_CONFLICT)
+
+        # create a marksheet instance for this enrollment automatically 
+        Marksheet.objects.create(course_enrollment=course_enrollment)
+        return course_enrollment
+
+
+def update_enrollment(serializer):
+    """
+        Save a validated CourseEnrollmentSerializer of an existing enrollment, e.g. moved into another course offer.
+        Raises RegistrationError like register_student(): the new offer is full (409) or the student 
+        is already enrolled in it (400); the enrollment keeps its old offer and seat then.
+    """
+    try:
+        with transaction.atomic():
+            return serializer.save()
+    except IntegrityError:
+        raise RegistrationError('Student already enrolled in this course offer.')
+    except NoSeatsAvailable as e:
+        raise RegistrationError(str(e), status.HTTP_409_CONFLICT)
+
+
+def register_students(student_ids, course_offer_ids, regular=True, non_credit=False):
+    """
+        Enroll many students into one or more course offers in one transaction, with a fixed number of queries.
+
+        Every (student, course offer) pair is checked with the same rules as register_student(), 
+        but against sets loaded up front instead of a query per pair:
+        - unknown student/course offer, already enrolled in the offer, already enrolled in the course as regular.
+        - a retake (regular=False) marks the previous regular enrollments of the course as non-credit.
+        - seats: each offer row is locked and the pairs are accepted in the given order while seats are left.
+        The CourseEnrollment and Marksheet rows are bulk created.
+        Returns one result dict per pair: {'student', 'course_offer', 'status': 'enrolled'|'rejected', 'enrollment'|'error'}.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    course_offer_ids = list(dict.fromkeys(course_offer_ids))
+    results = {}
+
+    def reject(student_id, course_offer_id, error):
+        results[(student_id, course_offer_id)] = {
+            'student': student_id,
+            'course_offer': course_offer_id,
+            'status': 'rejected',
+            'error': error,
+        }
+
+    with transaction.atomic():
+        # lock students and offers in id order, the same order as other bulk registrations (no deadlocks)
+        existing_students = set(
+            Student.objects.select_for_update().filter(pk__in=student_ids).order_by('id').values_list('id', flat=True)
+        )
+        course_offers = {
+            course_offer.id: course_offer
+            for course_offer in CourseOffer.objects.select_for_update().filter(pk__in=course_offer_ids).order_by('id')
+            .only('id', 'course_id', 'capacity', 'enrolled_count')
+        }
+        course_ids = {course_offer.course_id for course_offer in course_offers.values()}
+
+        # every enrollment that can conflict with the requested pairs, in one query
+        enrolled_offers = set()
+        regular_courses = {}
+        for enrollment_id, student_id, course_offer_id, course_id, is_regular in CourseEnrollment.objects.filter(
+            student_id__in=existing_students, course_offer__course_id__in=course_ids
+        ).values_list('id', 'student_id', 'course_offer_id', 'course_offer__course_id', 'regular'):
+            enrolled_offers.add((student_id, course_offer_id))
+            if is_regular:
+                regular_courses.setdefault((student_id, course_id), []).append(enrollment_id)
+
+        retaken_enrollment_ids = []
+        retaking_students = set()
+        planned_regular = set()
+        accepted = []
+        for course_offer_id in course_offer_ids:
+            course_offer = course_offers.get(course_offer_id)
+            if course_offer is None:
+                for student_id in student_ids:
+                    reject(student_id, course_offer_id, 'CourseOffer not found.')
+                continue
+
+            available = course_offer.get_available_seats()
+            accepted_for_offer = 0
+            for student_id in student_ids:
+                if student_id not in existing_students:
+                    reject(student_id, course_offer_id, 'Student not found.')
+                    continue
+                if (student_id, course_offer_id) in enrolled_offers:
+                    reject(student_id, course_offer_id, 'Student already enrolled in this course offer.')
+                    continue
+
+                previous_regular = regular_courses.get((student_id, course_offer.course_id))
+                if regular and (previous_regular or (student_id, course_offer.course_id) in planned_regular):
+                    reject(student_id, course_offer_id, "Student already enrolled in this course as 'regular course'.")
+                    continue
+
+                if available is not None and accepted_for_offer >= available:
+                    reject(student_id, course_offer_id, 'No seats available in this course offer.')
+                    continue
+
+                if previous_regular:
+                    # A retake: previous enrollments of the course no longer count for credit.
+                    retaken_enrollment_ids.extend(previous_regular)
+                    retaking_students.add(student_id)
+                if regular:
+                    # a second offer of the same course in this request is not another regular enrollment
+                    planned_regular.add((student_id, course_offer.course_id))
+                accepted_for_offer += 1
+                accepted.append(CourseEnrollment(
+                    course_offer_id=course_offer_id,
+                    student_id=student_id,
+                    regular=regular,
+                    non_credit=non_credit,
+                ))
+
+            if accepted_for_offer:
+                # the offer row is locked, the seats counted above are still free
+                CourseOffer.reserve_seats(course_offer_id, accepted_for_offer)
+
+        if retaken_enrollment_ids:
+            CourseEnrollment.objects.filter(id__in=retaken_enrollment_ids).update(non_credit=True)
+            StudentAcademicSummary.schedule_refresh(retaking_students)
+
+        # bulk_create skips CourseEnrollment.save(): the seats were reserved above
+        enrollments = CourseEnrollment.objects.bulk_create(accepted)
+        # create a marksheet instance for each enrollment
+        Marksheet.objects.bulk_create([Marksheet(course_enrollment=enrollment) for enrollment in enrollments])
+
+    for enrollment in enrollments:
+        results[(enrollment.student_id, enrollment.course_offer_id)] = {
+            'student': enrollment.student_id,
+            'course_offer': enrollment.course_offer_id,
+            'status': 'enrolled',
+            'enrollment': enrollment.id,
+        }
+    return [results[(student_id, course_offer_id)] for course_offer_id in course_offer_ids for student_id in student_ids]
+
+
+def get_eligible_course_offers(student_id, semester_ids):
+    """
+        Return the ids of the course offers of the given semesters that the student can register for, 
+        with a fixed number of queries and set operations:
+        - every direct and indirect prerequisite of the course (CoursePrerequisiteClosure) is passed,
+        - the student is not enrolled in the course as regular (that course can only be retaken) nor in the offer,
+        - the offer has seats left.
+    """
+    passed_courses = {
+        course_id
+        for course_id, is_complete, assignment, mid_term, final in Marksheet.objects.filter(
+            course_enrollment__student_id=student_id, course_enrollment__course_offer__is_complete=True
+        ).values_list('course_enrollment__course_offer__course_id', 'course_enrollment__course_offer__is_complete', 'assignment', 'mid_term', 'final')
+        if get_result_status(is_complete, assignment, mid_term, final) == 'pass'
+    }
+
+    regular_courses = set()
+    enrolled_offers = set()
+    for course_offer_id, course_id, regular in CourseEnrollment.objects.filter(student_id=student_id).values_list(
+        'course_offer_id', 'course_offer__course_id', 'regular'
+    ):
+        enrolled_offers.add(course_offer_id)
+        if regular:
+            regular_courses.add(course_id)
+
+    course_offers = list(
+        CourseOffer.objects.filter(semester_id__in=semester_ids).values_list('id', 'course_id', 'capacity', 'enrolled_count')
+    )
+    required = defaultdict(set)
+    for course_id, prerequisite_id in CoursePrerequisiteClosure.objects.filter(
+        course_id__in={course_id for _, course_id, _, _ in course_offers}
+    ).values_list('course_id', 'prerequisite_id'):
+        required[course_id].add(prerequisite_id)
+
+    return [
+        course_offer_id
+        for course_offer_id, course_id, capacity, enrolled_count in course_offers
+        if course_offer_id not in enrolled_offers
+        and course_id not in regular_courses
+        and (not capacity or enrolled_count < capacity)
+        and required[course_id] <= passed_courses
+    ]
+
+
+def get_course_enrollments(student_ids, course_ids):
+    """
+        Return the enrollments of the students in offers of the courses, with one IN query,
+        as {(student_id, course_id): [{'id', 'course_offer', 'semester', 'regular', 'non_credit'}, ...]}.
+        Pairs without an enrollment are left out.
+    """
+    enrollments = defaultdict(list)
+    for enrollment_id, student_id, course_id, course_offer_id, semester_id, regular, non_credit in CourseEnrollment.objects.filter(
+        student_id__in=student_ids, course_offer__course_id__in=course_ids
+    ).order_by('id').values_list(
+        'id', 'student_id', 'course_offer__course_id', 'course_offer_id', 'course_offer__semester_id', 'regular', 'non_credit'
+    ):
+        enrollments[(student_id, course_id)].append({
+            'id': enrollment_id,
+            'course_offer': course_offer_id,
+            'semester': semester_id,
+            'regular': regular,
+            'non_credit': non_credit,
+        })
+    return enrollments
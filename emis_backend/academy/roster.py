@@ -0,0 +1,62 @@
+# academy/roster.py
+
+import csv
+from itertools import chain
+from .models import CourseEnrollment
+
+
+# roster column -> CourseEnrollment lookup
+ROSTER_COLUMNS = {
+    'enrollment': 'id',
+    'student': 'student_id',
+    'user': 'student__user_id',
+    'username': 'student__user__username',
+    'first_name': 'student__user__first_name',
+    'middle_name': 'student__user__middle_name',
+    'last_name': 'student__user__last_name',
+    'email': 'student__user__email',
+    'phone': 'student__phone',
+    'regular': 'regular',
+    'non_credit': 'non_credit',
+}
+
+
+def get_roster(course_offer_id):
+    """
+        The enrolled students of a course offer as value tuples in ROSTER_COLUMNS order, ordered by username.
+        A single query joining student and user that selects only the roster columns.
+    """
+    return (
+        CourseEnrollment.objects.filter(course_offer_id=course_offer_id)
+        .order_by('student__user__username', 'id')
+        .values_list(*ROSTER_COLUMNS.values())
+    )
+
+
+class Echo:
+    """
+        A file-like object that hands back what is written, so csv.writer can produce the lines of a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+# a spreadsheet runs a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def escape_csv_cell(value):
+    # names, emails and phones are user input: prefix formulas with ' so they are shown as text
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def iter_roster_csv(roster, chunk_size=500):
+    # iterator() streams the rows from the database cursor instead of caching the whole result set
+    writer = csv.writer(Echo())
+    return (
+        writer.writerow([escape_csv_cell(value) for value in row])
+        for row in chain([list(ROSTER_COLUMNS)], roster.iterator(chunk_size=chunk_size))
+    )
@@ -0,0 +1,54 @@
+# academy/semesters.py
+
+from core.cache import reference_data_cache
+
+
+class CurrentSemesters:
+    """
+        The running (not finished) semesters, kept in the reference data cache (core/cache.py) under 'current_semesters'.
+        Holds the serialized semesters for the open semesters endpoint and, for every semester open for registration
+        (is_open and not is_finished), the ids of the programs offered in it, so eligibility checks need no query.
+        The cache key is invalidated by saves/deletes of Semester and TermChoices and by changes of Semester.programs
+        (registered in academy/models.py).
+    """
+
+    cache_key = 'current_semesters'
+
+    def _build(self):
+        from .models import Semester
+        from .serializers import SemesterNestedSerializer
+
+        semesters = Semester.objects.filter(is_finished=False).select_related('term').prefetch_related('programs')
+        data = list(SemesterNestedSerializer(semesters, many=True).data)
+        open_programs = {
+            semester.id: frozenset(program.id for program in semester.programs.all())
+            for semester in semesters if semester.is_open
+        }
+        return data, open_programs
+
+    def _get(self):
+        return reference_data_cache.get(self.cache_key, self._build)
+
+    def get_data(self):
+        """
+            Return the running semesters as SemesterNestedSerializer data.
+        """
+        return self._get()[0]
+
+    def get_open_semester_ids(self):
+        """
+            Return the ids of the semesters open for registration.
+        """
+        return list(self._get()[1])
+
+    def is_open(self, semester_id):
+        return semester_id in self._get()[1]
+
+    def get_open_programs(self, semester_id):
+        """
+            Return the ids of the programs offered in a semester open for registration (empty if it is not open).
+        """
+        return self._get()[1].get(semester_id, frozenset())
+
+
+current_semesters = CurrentSemesters()
@@ -1,5 +1,6 @@
 # academy/serializers.py 
 
+from django.db import models
 from rest_framework import serializers, status
 from authentication.serializers import UserBriefSerializer
 from comments.serializers import CommentSerializer
@@ -11,6 +12,8 @@ from teacher.serializers import TeacherBriefSerializer
 from teacher.models import Teacher
 
 
+from .dynamic_fields import DynamicFieldsMixin
+from .grading import calculate_total_marks, get_result_status, grade_band_index
 from .models import (
     Designation,
     Institute,
@@ -20,6 +23,7 @@ from .models import (
     TermChoices,
     Semester,
     Course,
+    CoursePrerequisiteClosure,
     TeacherEnrollment,
     Batch,
     Section,
@@ -27,41 +31,55 @@ from .models import (
     CourseOffer,
     CourseEnrollment,
     Marksheet,
-    CGPATable,
+    StudentAcademicSummary,
 )
 
 
-class DesignationSerializer(serializers.ModelSerializer):
+class DesignationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Designation
         fields = '__all__'
 
 
-class InstituteSerializer(serializers.ModelSerializer):
+class InstituteSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Institute
         fields = '__all__'
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Department
         fields = '__all__'
 
 
-class DegreeTypeSerializer(serializers.ModelSerializer):
+class DepartmentNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    institute = InstituteSerializer(read_only=True)
+    # annotated by setup_eager_loading()
+    program_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Department
+        fields = ['id', 'name', 'acronym', 'code', 'about', 'history', 'institute', 'program_count']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('institute').annotate(program_count=models.Count('program'))
+
+
+class DegreeTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = DegreeType
         fields = '__all__'
 
 
-class ProgramSerializer(serializers.ModelSerializer):
+class ProgramSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Program
         fields = '__all__'
 
 
-class ProgramNestedSerializer(serializers.ModelSerializer):
+class ProgramNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     degree_type = DegreeTypeSerializer(read_only=True)
     department = DepartmentSerializer(read_only=True)
 
@@ -70,19 +88,19 @@ class ProgramNestedSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class TermChoicesSerializer(serializers.ModelSerializer):
+class TermChoicesSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = TermChoices
         fields = '__all__'
 
 
-class SemesterSerializer(serializers.ModelSerializer):
+class SemesterSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Semester
         fields = '__all__'
 
 
-class SemesterNestedSerializer(serializers.ModelSerializer):
+class SemesterNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     term = TermChoicesSerializer(read_only=True)
     # programs = ProgramNestedSerializer(many=True, read_only=True)
     class Meta:
@@ -90,13 +108,19 @@ class SemesterNestedSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = '__all__'
 
+    def validate_prerequisites(self, value):
+        # a new course cannot be a prerequisite of anything yet, only updates can close a cycle
+        if self.instance and CoursePrerequisiteClosure.creates_cycle(self.instance.pk, [course.pk for course in value]):
+            raise serializers.ValidationError('These prerequisites would create a cycle.')
+        return value
+
 
-class CourseNestedSerializer(serializers.ModelSerializer):
+class CourseNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     prerequisites = serializers.SerializerMethodField()
     programs = ProgramNestedSerializer(many=True, read_only=True)
 
@@ -104,18 +128,40 @@ class CourseNestedSerializer(serializers.ModelSerializer):
         model = Course
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.prefetch_related(
+            models.Prefetch('programs', queryset=Program.objects.select_related('degree_type', 'department'))
+        )
+
     def get_prerequisites(self, obj):
-        prerequisites = CourseNestedSerializer(obj.prerequisites.all(), many=True).data
+        # The whole tree comes from the CoursePrerequisiteClosure of the root course (see get_graph), 
+        # and is shared with the nested serializers through the context.
+        graph = self.context.get('prerequisite_graph')
+        if graph is None:
+            prerequisite_ids, edges = CoursePrerequisiteClosure.get_graph(obj.pk)
+            courses = self.setup_eager_loading(Course.objects.filter(pk__in=prerequisite_ids)).in_bulk()
+            graph = {'edges': edges, 'courses': courses, 'data': {}, 'path': (obj.pk,)}
+
+        prerequisites = []
+        for prerequisite_id in graph['edges'].get(obj.pk, ()):
+            # a cycle created before the closure existed must not recurse forever 
+            if prerequisite_id in graph['path'] or prerequisite_id not in graph['courses']:
+                continue
+            if prerequisite_id not in graph['data']:
+                context = {**self.context, 'prerequisite_graph': {**graph, 'path': graph['path'] + (prerequisite_id,)}}
+                graph['data'][prerequisite_id] = CourseNestedSerializer(graph['courses'][prerequisite_id], context=context).data
+            prerequisites.append(graph['data'][prerequisite_id])
         return prerequisites
 
 
-class TeacherEnrollmentSerializer(serializers.ModelSerializer):
+class TeacherEnrollmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = TeacherEnrollment
         fields = '__all__'
 
 
-class TeacherEnrollmentViewSerializer(serializers.ModelSerializer):
+class TeacherEnrollmentViewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     teacher = TeacherBriefSerializer()
     designations = DesignationSerializer(many=True)
     departments = serializers.SerializerMethodField()
@@ -124,6 +170,11 @@ class TeacherEnrollmentViewSerializer(serializers.ModelSerializer):
         model = TeacherEnrollment
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # Load every relation the serializer touches up front, so the cost does not grow per row 
+        return queryset.select_related('teacher__user').prefetch_related('designations', 'departments')
+
     def get_departments(self, obj):
         departments = obj.departments.all()
         department_data = DepartmentSerializer(departments, many=True).data
@@ -140,13 +191,13 @@ class TeacherEnrollmentViewSerializer(serializers.ModelSerializer):
         return filtered_data
 
 
-class BatchSerializer(serializers.ModelSerializer):
+class BatchSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Batch
         fields = '__all__'
 
 
-class SectionSerializer(serializers.ModelSerializer):
+class SectionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     available_seats = serializers.SerializerMethodField()
     batch_data = serializers.SerializerMethodField()
 
@@ -155,20 +206,16 @@ class SectionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_available_seats(self, obj):
-        enrolled_count = StudentEnrollment.objects.filter(batch_section=obj).count()
-        return obj.max_seats - enrolled_count
+        return obj.get_available_seats()
 
     def get_batch_data(self, obj):
-        try:
-            batch = Batch.objects.get(id=obj.batch.id)
-            batch_serializer = BatchSerializer(batch)
-            return batch_serializer.data
-        except Batch.DoesNotExist:
-            return None
+        # Select/prefetch sections with 'batch' to avoid a query per section 
+        batch_serializer = BatchSerializer(obj.batch)
+        return batch_serializer.data
 
 
 
-class BatchNestedSerializer(serializers.ModelSerializer):
+class BatchNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     program = ProgramNestedSerializer(read_only=True)
     sections = SectionSerializer(many=True, read_only=True)
 
@@ -178,13 +225,13 @@ class BatchNestedSerializer(serializers.ModelSerializer):
 
 
 
-class StudentEnrollmentSerializer(serializers.ModelSerializer):
+class StudentEnrollmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = StudentEnrollment
         fields = '__all__'
 
 
-class StudentEnrollmentNestedSerializer(serializers.ModelSerializer):
+class StudentEnrollmentNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     batch_section = SectionSerializer(read_only=True)
     enrolled_by = UserBriefSerializer(read_only=True)
     updated_by = UserBriefSerializer(read_only=True)
@@ -195,33 +242,92 @@ class StudentEnrollmentNestedSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class CourseOfferSerializer(serializers.ModelSerializer):
+class CourseOfferSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CourseOffer
         fields = '__all__'
 
 
-class CourseOfferNestedSerializer(serializers.ModelSerializer):
+def get_teacher_enrollment_map(teacher_ids):
+    """
+        Serialize the enrollments of the given teachers in a fixed number of queries.
+        Returns a dict of teacher id -> TeacherEnrollmentViewSerializer data.
+    """
+    teacher_enrollments = TeacherEnrollmentViewSerializer.setup_eager_loading(
+        TeacherEnrollment.objects.filter(teacher_id__in=set(teacher_ids)).order_by('id')
+    )
+    enrollment_map = {}
+    for teacher_enrollment in teacher_enrollments:
+        # keep the first enrollment of a teacher, the same one a single lookup would return 
+        if teacher_enrollment.teacher_id not in enrollment_map:
+            enrollment_map[teacher_enrollment.teacher_id] = TeacherEnrollmentViewSerializer(teacher_enrollment).data
+    return enrollment_map
+
+
+class CourseOfferNestedListSerializer(serializers.ListSerializer):
+    """
+        List path of CourseOfferNestedSerializer. 
+        Resolves the teacher enrollments of all offers at once instead of one lookup per offer.
+    """
+
+    def to_representation(self, data):
+        course_offers = list(data.all() if isinstance(data, models.Manager) else data)
+        # nothing to resolve when ?fields=/?expand= render the teacher as an id (or not at all)
+        if isinstance(self.child.fields.get('teacher'), serializers.SerializerMethodField):
+            self.child.teacher_enrollment_map = get_teacher_enrollment_map(
+                course_offer.teacher_id for course_offer in course_offers if course_offer.teacher_id
+            )
+        try:
+            return super().to_representation(course_offers)
+        finally:
+            self.child.teacher_enrollment_map = None
+
+
+class CourseOfferNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     semester = SemesterNestedSerializer(read_only=True)
     course = CourseSerializer(read_only=True)
     teacher = serializers.SerializerMethodField()
     comments = CommentSerializer(many=True)
 
+    teacher_enrollment_map = None
+
     def get_teacher(self, course_offer):
-        teacher = course_offer.teacher
-        if teacher:
-            teacher_enrollment = get_object_or_404(TeacherEnrollment, teacher=teacher)
-            serializer = TeacherEnrollmentViewSerializer(teacher_enrollment)
-            return serializer.data
+        if not course_offer.teacher_id:
+            return None
 
-        return None
+        # Batched list path: the enrollment has already been serialized 
+        if self.teacher_enrollment_map and course_offer.teacher_id in self.teacher_enrollment_map:
+            return self.teacher_enrollment_map[course_offer.teacher_id]
+
+        # Nested in another list (e.g. course enrollments): look each teacher up once per response 
+        teacher_enrollments = self.context.setdefault('teacher_enrollments', {})
+        if course_offer.teacher_id not in teacher_enrollments:
+            teacher_enrollment = get_object_or_404(
+                TeacherEnrollmentViewSerializer.setup_eager_loading(TeacherEnrollment.objects.all()),
+                teacher_id=course_offer.teacher_id
+            )
+            teacher_enrollments[course_offer.teacher_id] = TeacherEnrollmentViewSerializer(teacher_enrollment).data
+        return teacher_enrollments[course_offer.teacher_id]
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # Semester/course ('__all__') also render their many-to-many ids, so prefetch those too 
+        return queryset.select_related('semester__term', 'course').prefetch_related(
+            'semester__programs',
+            'course__programs',
+            'course__prerequisites',
+            'comments',
+        )
 
     class Meta:
         model = CourseOffer
         fields = '__all__'
+        list_serializer_class = CourseOfferNestedListSerializer
+        # rendered as the teacher id unless expanded (?expand=teacher) when the shape is restricted
+        expandable_fields = ['teacher']
 
 
-class CourseOfferSemiNestedSerializer(serializers.ModelSerializer):
+class CourseOfferSemiNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     semester = SemesterNestedSerializer(read_only=True)
     course = CourseSerializer(read_only=True)
 
@@ -239,7 +345,7 @@ class CourseOfferSemiNestedSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class CourseEnrollmentSerializer(serializers.ModelSerializer):
+class CourseEnrollmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CourseEnrollment
         fields = '__all__'
@@ -266,32 +372,77 @@ class CourseEnrollmentSerializer(serializers.ModelSerializer):
         if not regular and previous_enrollments.exists():
             # If the student is re-enrolling with regular=False, update the previous enrollments' non_credit field to True.
             previous_enrollments.update(non_credit=True)
+            # queryset updates do not send signals, so refresh the student's academic summary here 
+            StudentAcademicSummary.schedule_refresh([student.id])
 
         return data
 
 
 
-class CourseEnrollmentNestedSerializer(serializers.ModelSerializer):
+class CourseRegistrationSerializer(serializers.Serializer):
+    """
+        Input of a course registration (see academy.registration.register_student). 
+        Only ids are validated here; existence, duplicates and capacity are checked inside the registration transaction.
+    """
+    student = serializers.IntegerField(source='student_id')
+    course_offer = serializers.IntegerField(source='course_offer_id')
+    regular = serializers.BooleanField(default=True)
+    non_credit = serializers.BooleanField(default=False)
+
+
+
+class BulkCourseRegistrationSerializer(serializers.Serializer):
+    """
+        Input of a bulk course registration (see academy.registration.register_students). 
+        The students are given as a list of ids and/or every active student of a section or a batch.
+    """
+    students = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    section = serializers.IntegerField(required=False)
+    batch = serializers.IntegerField(required=False)
+    course_offers = serializers.ListField(child=serializers.IntegerField(), min_length=1)
+    regular = serializers.BooleanField(default=True)
+    non_credit = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if not (data['students'] or 'section' in data or 'batch' in data):
+            raise serializers.ValidationError("Provide 'students', 'section' or 'batch'.")
+        return data
+
+    def get_student_ids(self):
+        data = self.validated_data
+        student_ids = list(data['students'])
+        if 'section' in data or 'batch' in data:
+            enrollments = StudentEnrollment.objects.filter(is_active=True)
+            if 'section' in data:
+                enrollments = enrollments.filter(batch_section_id=data['section'])
+            if 'batch' in data:
+                enrollments = enrollments.filter(batch_section__batch_id=data['batch'])
+            student_ids += enrollments.order_by('student_id').values_list('student_id', flat=True)
+        return student_ids
+
+
+
+class CourseEnrollmentNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     course_offer = CourseOfferNestedSerializer(read_only=True)
     class Meta:
         model = CourseEnrollment
         fields = '__all__'
 
 
-class CourseEnrollmentSemiNestedSerializer(serializers.ModelSerializer):
+class CourseEnrollmentSemiNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     course_offer = CourseOfferSemiNestedSerializer(read_only=True)
     class Meta:
         model = CourseEnrollment
         fields = '__all__'
 
 
-class MarksheetSerializer(serializers.ModelSerializer):
+class MarksheetSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Marksheet
         fields = '__all__'
 
 
-class MarksheetNestedSerializer(serializers.ModelSerializer):
+class MarksheetNestedSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     course_enrollment = CourseEnrollmentSerializer()
     
     class Meta:
@@ -300,7 +451,7 @@ class MarksheetNestedSerializer(serializers.ModelSerializer):
 
 
 
-class AcademicRecordsSerializer(serializers.ModelSerializer):
+class AcademicRecordsSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Define serializer fields
     course_enrollment = CourseEnrollmentSemiNestedSerializer()
     status = serializers.SerializerMethodField()
@@ -311,6 +462,17 @@ class AcademicRecordsSerializer(serializers.ModelSerializer):
         model = Marksheet
         fields = '__all__'
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related(
+            'course_enrollment__course_offer__semester__term',
+            'course_enrollment__course_offer__course',
+        ).prefetch_related(
+            'course_enrollment__course_offer__semester__programs',
+            'course_enrollment__course_offer__course__programs',
+            'course_enrollment__course_offer__course__prerequisites',
+        )
+
     def get_letter_grade(self, obj):
         # Check if the course enrollment is not complete or is non-credit
         if not obj.course_enrollment.course_offer.is_complete or obj.course_enrollment.non_credit:
@@ -328,57 +490,18 @@ class AcademicRecordsSerializer(serializers.ModelSerializer):
         return cgpa_entry.grade_point if cgpa_entry else None
 
     def _get_cgpa_entry(self, obj):
-        # Calculate the total marks, replacing None values with 0
-        attendance = obj.attendance if obj.attendance is not None else 0
-        assignment = obj.assignment if obj.assignment is not None else 0
-        mid_term = obj.mid_term if obj.mid_term is not None else 0
-        final = obj.final if obj.final is not None else 0
-
-        total_marks = attendance + assignment + mid_term + final
+        total_marks = calculate_total_marks(obj.attendance, obj.assignment, obj.mid_term, obj.final)
 
-        # Fetch the CGPA entry for the given total_marks range
-        cgpa_entry = CGPATable.objects.filter(
-            # "lower_mark__lte=total_marks" means we are looking for CGPA entries where the lower_mark 
-            # value (minimum marks required for a grade) is less than or equal to the total_marks.
-            # "higher_mark__gte=total_marks" means we are looking for CGPA entries where the
-            # higher_mark value (maximum marks allowed) is greater than or equal to the total_marks.
-            lower_mark__lte=total_marks, higher_mark__gte=total_marks
-        ).first()
-
-        return cgpa_entry
+        # Resolve the grade band for the given total_marks from the CGPATable index, loaded once per serialization
+        # (with many=True every row goes through the same child serializer)
+        if not hasattr(self, '_grade_bands'):
+            self._grade_bands = grade_band_index.get_bands()
+        return self._grade_bands.resolve(total_marks)
 
     def get_status(self, obj):
         # Get the course offer associated with the Marksheet's course enrollment
         course_offer = obj.course_enrollment.course_offer
-
-        # Check if the course is ongoing
-        if not course_offer.is_complete:
-            # If the course is not completed yet, return 'on going'
-            return 'on going'
-
-        # Calculate the pass marks for each component, replacing None values with 0
-        require_percentage = 0.4  # 40% required to pass
-        pass_marks_final = require_percentage * 40  # require_percentage of max marks for 'final': 40
-        pass_marks_mid_term = require_percentage * 30  # require_percentage of max marks for 'mid_term': 30
-        pass_marks_assignment = require_percentage * 20  # require_percentage of max marks for 'assignment': 20
-
-        assignment = obj.assignment if obj.assignment is not None else 0
-        mid_term = obj.mid_term if obj.mid_term is not None else 0
-        final = obj.final if obj.final is not None else 0
-
-        # Check the conditions for different statuses in reverse order
-        if assignment < pass_marks_assignment:
-            # If 'assignment' marks are less than the pass marks, return 'fail'
-            return 'fail'
-        elif mid_term < pass_marks_mid_term:
-            # If 'mid_term' marks are less than the pass marks, return 'retake'
-            return 'retake'
-        elif final < pass_marks_final:
-            # If 'final' marks are less than the pass marks, return 'supplementary'
-            return 'supplementary'
-        else:
-            # If none of the above conditions are met, return 'pass'
-            return 'pass'
+        return get_result_status(course_offer.is_complete, obj.assignment, obj.mid_term, obj.final)
 
 
 
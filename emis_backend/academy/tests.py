@@ -1,3 +1,453 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from authentication.models import User
+from student.models import Student
+from .gradebook import GradebookError, apply_gradebook
+from .models import (
+    Batch, Course, CourseEnrollment, CourseOffer, CoursePrerequisiteClosure, Marksheet, NoSeatsAvailable, PrerequisiteCycle,
+    Program, Section, Semester, StudentEnrollment, TermChoices,
+)
+from .registration import get_eligible_course_offers, register_students
 
-# Create your tests here.
+
+class SeatCounterTests(TestCase):
+    """
+        CourseOffer.enrolled_count / Section.enrolled_count: the capacity guard and the counter maintenance.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        term = TermChoices.objects.create(name='Seat test')
+        semester = Semester.objects.create(term=term, year=2100, code=210001)
+        course = Course.objects.create(name='Seat test', acronym='ST', code=101, credit=3.0)
+        other_course = Course.objects.create(name='Seat test 2', acronym='ST', code=102, credit=3.0)
+        cls.course_offer = CourseOffer.objects.create(semester=semester, course=course, capacity=2)
+        cls.other_course_offer = CourseOffer.objects.create(semester=semester, course=other_course, capacity=2)
+        cls.students = [Student.objects.create(nid=f'seat-test-{i}') for i in range(3)]
+
+        batch = Batch.objects.create(number=1)
+        cls.section = Section.objects.create(name='A', batch=batch, max_seats=2)
+        cls.other_section = Section.objects.create(name='B', batch=batch, max_seats=2)
+
+    def enroll(self, student, course_offer=None):
+        return CourseEnrollment.objects.create(student=student, course_offer=course_offer or self.course_offer)
+
+    def assertEnrolledCount(self, counter, expected):
+        counter.refresh_from_db()
+        self.assertEqual(counter.enrolled_count, expected)
+
+    def test_enrollment_over_capacity_is_rejected(self):
+        self.enroll(self.students[0])
+        self.enroll(self.students[1])
+
+        with self.assertRaises(NoSeatsAvailable):
+            self.enroll(self.students[2])
+
+        # the rejected enrollment is rolled back with its counter update
+        self.assertEnrolledCount(self.course_offer, 2)
+        self.assertEqual(CourseEnrollment.objects.filter(course_offer=self.course_offer).count(), 2)
+        self.assertEqual(self.course_offer.get_available_seats(), 0)
+
+    def test_reserve_seats_takes_all_or_nothing(self):
+        self.assertFalse(CourseOffer.reserve_seats(self.course_offer.id, 3))
+        self.assertEnrolledCount(self.course_offer, 0)
+
+        self.assertTrue(CourseOffer.reserve_seats(self.course_offer.id, 2))
+        self.assertFalse(CourseOffer.reserve_seats(self.course_offer.id, 1))
+        self.assertEnrolledCount(self.course_offer, 2)
+
+    def test_zero_capacity_means_unlimited(self):
+        CourseOffer.objects.filter(pk=self.course_offer.pk).update(capacity=0)
+        for student in self.students:
+            self.enroll(student)
+
+        self.course_offer.refresh_from_db()
+        self.assertEqual(self.course_offer.enrolled_count, 3)
+        self.assertIsNone(self.course_offer.get_available_seats())
+        self.assertTrue(CourseOffer.reserve_seats(self.course_offer.id, 1000))
+
+    def test_delete_releases_the_seat(self):
+        enrollment = self.enroll(self.students[0])
+        self.enroll(self.students[1])
+
+        enrollment.delete()
+        self.assertEnrolledCount(self.course_offer, 1)
+
+        # cascading deletes release their seats as well
+        self.students[1].delete()
+        self.assertEnrolledCount(self.course_offer, 0)
+
+        # a freed seat can be taken again
+        self.enroll(self.students[2])
+        self.assertEnrolledCount(self.course_offer, 1)
+
+    def test_moving_an_enrollment_moves_the_seat(self):
+        enrollment = self.enroll(self.students[0])
+
+        enrollment.course_offer = self.other_course_offer
+        enrollment.save()
+        self.assertEnrolledCount(self.course_offer, 0)
+        self.assertEnrolledCount(self.other_course_offer, 1)
+
+        # saving without a change takes no seat
+        enrollment.non_credit = True
+        enrollment.save()
+        self.assertEnrolledCount(self.other_course_offer, 1)
+
+    def test_moving_into_a_full_offer_keeps_the_old_seat(self):
+        enrollment = self.enroll(self.students[0])
+        self.enroll(self.students[1], self.other_course_offer)
+        self.enroll(self.students[2], self.other_course_offer)
+
+        enrollment.course_offer = self.other_course_offer
+        with self.assertRaises(NoSeatsAvailable):
+            enrollment.save()
+
+        self.assertEnrolledCount(self.course_offer, 1)
+        self.assertEnrolledCount(self.other_course_offer, 2)
+        self.assertEqual(CourseEnrollment.objects.get(pk=enrollment.pk).course_offer_id, self.course_offer.id)
+
+    def test_updating_into_a_full_offer_returns_409(self):
+        enrollment = self.enroll(self.students[0])
+        self.enroll(self.students[1], self.other_course_offer)
+        self.enroll(self.students[2], self.other_course_offer)
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='seat-test', role='administrator'))
+        url = f'/api/academy/course-enrollment/{enrollment.id}/'
+        data = {'student': self.students[0].id, 'course_offer': self.other_course_offer.id, 'regular': True}
+        for response in (client.put(url, data, format='json'), client.patch(url, data, format='json')):
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+            self.assertIn('non_field_errors', response.data)
+
+        self.assertEnrolledCount(self.course_offer, 1)
+        self.assertEnrolledCount(self.other_course_offer, 2)
+        self.assertEqual(CourseEnrollment.objects.get(pk=enrollment.pk).course_offer_id, self.course_offer.id)
+
+    def test_section_counter_follows_student_enrollments(self):
+        enrollment = StudentEnrollment.objects.create(student=self.students[0], batch_section=self.section)
+        self.assertEnrolledCount(self.section, 1)
+
+        enrollment.batch_section = self.other_section
+        enrollment.save()
+        self.assertEnrolledCount(self.section, 0)
+        self.assertEnrolledCount(self.other_section, 1)
+
+        # leaving the section (no section) releases the seat
+        enrollment.batch_section = None
+        enrollment.save()
+        self.assertEnrolledCount(self.other_section, 0)
+
+        enrollment.batch_section = self.section
+        enrollment.save()
+        enrollment.delete()
+        self.assertEnrolledCount(self.section, 0)
+
+    def test_counters_do_not_go_below_zero(self):
+        CourseOffer.release_seats(self.course_offer.id)
+        Section.adjust_enrolled_count(self.section.id, -1)
+        self.assertEnrolledCount(self.course_offer, 0)
+        self.assertEnrolledCount(self.section, 0)
+
+    def test_reconcile_seat_counters_repairs_drift(self):
+        self.enroll(self.students[0])
+        StudentEnrollment.objects.create(student=self.students[0], batch_section=self.section)
+        # drift from writes that bypass save()/delete()
+        CourseOffer.objects.filter(pk=self.course_offer.pk).update(enrolled_count=2)
+        CourseOffer.objects.filter(pk=self.other_course_offer.pk).update(enrolled_count=1)
+        Section.objects.filter(pk=self.section.pk).update(enrolled_count=0)
+
+        call_command('reconcile_seat_counters', '--dry-run', stdout=StringIO())
+        self.assertEnrolledCount(self.course_offer, 2)
+
+        call_command('reconcile_seat_counters', stdout=StringIO())
+        self.assertEnrolledCount(self.course_offer, 1)
+        self.assertEnrolledCount(self.other_course_offer, 0)
+        self.assertEnrolledCount(self.section, 1)
+        self.assertEnrolledCount(self.other_section, 0)
+
+
+class GradebookTests(TestCase):
+    """
+        apply_gradebook(): the per row validation of a whole course offer.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        term = TermChoices.objects.create(name='Gradebook test')
+        semester = Semester.objects.create(term=term, year=2100, code=210002)
+        course = Course.objects.create(name='Gradebook test', acronym='GT', code=101, credit=3.0)
+        cls.course_offer = CourseOffer.objects.create(semester=semester, course=course)
+        cls.marksheets = []
+        for i in range(2):
+            enrollment = CourseEnrollment.objects.create(student=Student.objects.create(nid=f'gradebook-test-{i}'), course_offer=cls.course_offer)
+            cls.marksheets.append(Marksheet.objects.create(course_enrollment=enrollment))
+
+    def test_marks_out_of_range_are_reported_per_row(self):
+        rows = [
+            {'marksheet': self.marksheets[0].id, 'attendance': -50, 'final': 40},
+            {'marksheet': self.marksheets[1].id, 'assignment': 21, 'mid_term': '-0.5'},
+        ]
+        with self.assertRaises(GradebookError) as context:
+            apply_gradebook(self.course_offer.id, rows)
+
+        self.assertEqual(context.exception.errors, [
+            {'row': 1, 'errors': {'attendance': 'Marks cannot be negative.'}},
+            {'row': 2, 'errors': {'assignment': 'Assignment score cannot exceed 20.', 'mid_term': 'Marks cannot be negative.'}},
+        ])
+        # nothing is written when a row is invalid
+        self.assertFalse(Marksheet.objects.filter(course_enrollment__course_offer=self.course_offer, final__isnull=False).exists())
+
+    def test_valid_marks_are_applied(self):
+        rows = [{'marksheet': marksheet.id, 'attendance': 0, 'final': 40} for marksheet in self.marksheets]
+        self.assertEqual(apply_gradebook(self.course_offer.id, rows), 2)
+        self.assertEqual(Marksheet.objects.filter(attendance=0, final=40).count(), 2)
+
+
+class BulkRegistrationTests(TestCase):
+    """
+        register_students(): every (student, course offer) pair is checked on its own, rejected pairs do not stop the others.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        term = TermChoices.objects.create(name='Bulk test')
+        semester = Semester.objects.create(term=term, year=2100, code=210003)
+        course = Course.objects.create(name='Bulk test', acronym='BT', code=101, credit=3.0)
+        other_course = Course.objects.create(name='Bulk test 2', acronym='BT', code=102, credit=3.0)
+        cls.course_offer = CourseOffer.objects.create(semester=semester, course=course, capacity=2)
+        cls.other_course_offer = CourseOffer.objects.create(semester=semester, course=other_course)
+        cls.students = [Student.objects.create(nid=f'bulk-test-{i}') for i in range(3)]
+
+    def get_results(self, results):
+        return {(result['student'], result['course_offer']): result for result in results}
+
+    def test_seats_are_given_in_order_and_the_rest_is_rejected(self):
+        student_ids = [student.id for student in self.students]
+        results = self.get_results(register_students(student_ids, [self.course_offer.id, self.other_course_offer.id]))
+
+        self.assertEqual(len(results), 6)
+        for student_id in student_ids[:2]:
+            self.assertEqual(results[(student_id, self.course_offer.id)]['status'], 'enrolled')
+        self.assertEqual(results[(student_ids[2], self.course_offer.id)], {
+            'student': student_ids[2],
+            'course_offer': self.course_offer.id,
+            'status': 'rejected',
+            'error': 'No seats available in this course offer.',
+        })
+        # the full offer does not stop the other offer
+        for student_id in student_ids:
+            self.assertEqual(results[(student_id, self.other_course_offer.id)]['status'], 'enrolled')
+
+        self.course_offer.refresh_from_db()
+        self.assertEqual(self.course_offer.enrolled_count, 2)
+        self.assertEqual(CourseEnrollment.objects.count(), 5)
+        self.assertEqual(Marksheet.objects.count(), 5)
+
+    def test_every_pair_gets_its_own_error(self):
+        CourseEnrollment.objects.create(student=self.students[0], course_offer=self.other_course_offer)
+        missing_student_id = max(student.id for student in self.students) + 1
+        missing_course_offer_id = self.other_course_offer.id + 1000
+
+        results = self.get_results(register_students(
+            [self.students[0].id, missing_student_id], [self.other_course_offer.id, missing_course_offer_id]
+        ))
+
+        self.assertEqual(results[(self.students[0].id, self.other_course_offer.id)]['error'], 'Student already enrolled in this course offer.')
+        self.assertEqual(results[(missing_student_id, self.other_course_offer.id)]['error'], 'Student not found.')
+        self.assertEqual(results[(self.students[0].id, missing_course_offer_id)]['error'], 'CourseOffer not found.')
+        self.assertEqual(CourseEnrollment.objects.count(), 1)
+
+    def test_a_regular_course_is_taken_once_and_retaken_as_non_regular(self):
+        first = CourseEnrollment.objects.create(student=self.students[0], course_offer=self.other_course_offer)
+        retake_offer = CourseOffer.objects.create(semester=self.other_course_offer.semester, course=self.other_course_offer.course)
+
+        results = register_students([self.students[0].id], [retake_offer.id])
+        self.assertEqual(results[0]['error'], "Student already enrolled in this course as 'regular course'.")
+
+        results = register_students([self.students[0].id], [retake_offer.id], regular=False)
+        self.assertEqual(results[0]['status'], 'enrolled')
+        first.refresh_from_db()
+        self.assertTrue(first.non_credit)
+
+
+class PrerequisiteClosureTests(TestCase):
+    """
+        CoursePrerequisiteClosure follows Course.prerequisites; prerequisites that close a cycle are rejected.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # d requires c, c requires b, b requires a
+        cls.a, cls.b, cls.c, cls.d = [
+            Course.objects.create(name=f'Closure test {i}', acronym='CT', code=100 + i, credit=3.0) for i in range(4)
+        ]
+        cls.b.prerequisites.add(cls.a)
+        cls.c.prerequisites.add(cls.b)
+        cls.d.prerequisites.add(cls.c)
+
+    def get_closure(self, course):
+        return dict(CoursePrerequisiteClosure.objects.filter(course=course).values_list('prerequisite_id', 'depth'))
+
+    def test_closure_holds_direct_and_indirect_prerequisites(self):
+        self.assertEqual(self.get_closure(self.d), {self.c.id: 1, self.b.id: 2, self.a.id: 3})
+        self.assertEqual(self.get_closure(self.a), {})
+
+        # a shortcut edge makes the shortest chain the depth
+        self.d.prerequisites.add(self.a)
+        self.assertEqual(self.get_closure(self.d), {self.c.id: 1, self.b.id: 2, self.a.id: 1})
+
+    def test_removing_and_deleting_update_the_dependents(self):
+        self.c.prerequisites.remove(self.b)
+        self.assertEqual(self.get_closure(self.d), {self.c.id: 1})
+
+        self.c.prerequisites.add(self.b)
+        self.b.delete()
+        self.assertEqual(self.get_closure(self.c), {})
+        self.assertEqual(self.get_closure(self.d), {self.c.id: 1})
+
+    def test_a_prerequisite_that_closes_a_cycle_is_rejected(self):
+        for course, prerequisite in ((self.a, self.d), (self.b, self.c), (self.a, self.a)):
+            with self.assertRaises(PrerequisiteCycle), transaction.atomic():
+                course.prerequisites.add(prerequisite)
+        self.assertEqual(self.get_closure(self.a), {})
+
+    def test_course_update_with_a_cycle_returns_400(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='closure-test', role='administrator'))
+        response = client.patch(f'/api/academy/courses/{self.a.id}/', {'prerequisites': [self.d.id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('prerequisites', response.data)
+        self.assertFalse(self.a.prerequisites.exists())
+
+    def test_rebuild_prerequisite_closure_recreates_the_rows(self):
+        expected = set(CoursePrerequisiteClosure.objects.values_list('course_id', 'prerequisite_id', 'depth'))
+        CoursePrerequisiteClosure.objects.all().delete()
+
+        call_command('rebuild_prerequisite_closure', stdout=StringIO())
+        self.assertEqual(set(CoursePrerequisiteClosure.objects.values_list('course_id', 'prerequisite_id', 'depth')), expected)
+
+
+class EligibleCourseOffersTests(TestCase):
+    """
+        get_eligible_course_offers() and the eligible course offers endpoint.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        term = TermChoices.objects.create(name='Eligibility test')
+        past_semester = Semester.objects.create(term=term, year=2099, code=209904, is_open=False, is_finished=True)
+        cls.semester = Semester.objects.create(term=term, year=2100, code=210004)
+        basics, advanced, elective, taken, popular = [
+            Course.objects.create(name=f'Eligibility test {i}', acronym='ET', code=100 + i, credit=3.0) for i in range(5)
+        ]
+        advanced.prerequisites.add(basics)
+        cls.student = Student.objects.create(nid='eligibility-test')
+        other_student = Student.objects.create(nid='eligibility-test-2')
+
+        # basics passed, taken enrolled as regular
+        passed = CourseEnrollment.objects.create(
+            student=cls.student, course_offer=CourseOffer.objects.create(semester=past_semester, course=basics, is_complete=True)
+        )
+        Marksheet.objects.create(course_enrollment=passed, attendance=10, assignment=20, mid_term=30, final=40)
+        CourseEnrollment.objects.create(
+            student=cls.student, course_offer=CourseOffer.objects.create(semester=past_semester, course=taken)
+        )
+
+        cls.advanced_offer = CourseOffer.objects.create(semester=cls.semester, course=advanced)
+        cls.elective_offer = CourseOffer.objects.create(semester=cls.semester, course=elective)
+        CourseOffer.objects.create(semester=cls.semester, course=taken)
+        full_offer = CourseOffer.objects.create(semester=cls.semester, course=popular, capacity=1)
+        CourseEnrollment.objects.create(student=other_student, course_offer=full_offer)
+
+        cls.program = Program.objects.create(name='Eligibility test', acronym='ETP', code=210004)
+        section = Section.objects.create(name='A', batch=Batch.objects.create(number=1, program=cls.program))
+        StudentEnrollment.objects.create(student=cls.student, batch_section=section)
+
+    def test_prerequisites_enrollments_and_seats_are_checked(self):
+        eligible = get_eligible_course_offers(self.student.id, [self.semester.id])
+        self.assertEqual(sorted(eligible), sorted([self.advanced_offer.id, self.elective_offer.id]))
+
+    def test_a_failed_prerequisite_is_not_passed(self):
+        Marksheet.objects.filter(course_enrollment__student=self.student).update(assignment=0)
+        self.assertEqual(get_eligible_course_offers(self.student.id, [self.semester.id]), [self.elective_offer.id])
+
+    def test_endpoint_lists_the_semesters_open_for_the_students_program(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='eligibility-test', role='administrator'))
+        url = f'/api/academy/students/{self.student.id}/eligible-course-offers/'
+
+        # the open semester does not offer the student's program
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+        self.semester.programs.add(self.program)
+        response = client.get(url)
+        self.assertEqual(sorted(offer['id'] for offer in response.data), sorted([self.advanced_offer.id, self.elective_offer.id]))
+
+        response = client.get(url, {'semester': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DynamicFieldsTests(TestCase):
+    """
+        ?fields= and ?expand= on the academy serializers (DynamicFieldsMixin).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        term = TermChoices.objects.create(name='Fields test')
+        cls.semester = Semester.objects.create(term=term, year=2100, code=210005)
+        cls.course = Course.objects.create(name='Fields test', acronym='FT', code=101, credit=3.0)
+        course_offer = CourseOffer.objects.create(semester=cls.semester, course=cls.course)
+        cls.students = [Student.objects.create(nid=f'fields-test-{i}') for i in range(3)]
+        cls.enrollments = [CourseEnrollment.objects.create(student=student, course_offer=course_offer) for student in cls.students]
+        cls.course_offer = course_offer
+        cls.user = User.objects.create(username='fields-test', role='administrator')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, params=None):
+        response = self.client.get('/api/academy/course-enrollment/', params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_without_parameters_the_declared_shape_is_rendered(self):
+        enrollment = self.get()[0]
+        self.assertEqual(enrollment['course_offer']['course']['code'], 101)
+        self.assertEqual(enrollment['course_offer']['semester']['term']['name'], 'Fields test')
+        self.assertEqual(enrollment['student'], self.students[0].id)
+
+    def test_fields_select_dotted_paths(self):
+        data = self.get({'fields': 'id,course_offer.course.code'})
+        self.assertEqual(data[0], {'id': self.enrollments[0].id, 'course_offer': {'course': {'code': 101}}})
+        self.assertEqual(len(data), 3)
+
+    def test_relations_that_are_not_expanded_become_primary_keys(self):
+        data = self.get({'fields': 'id,course_offer'})
+        self.assertEqual(data[0], {'id': self.enrollments[0].id, 'course_offer': self.course_offer.id})
+
+        course_offer = self.get({'expand': 'course_offer'})[0]['course_offer']
+        self.assertEqual(course_offer['course'], self.course.id)
+        self.assertEqual(course_offer['semester'], self.semester.id)
+        self.assertEqual(course_offer['comments'], [])
+        self.assertIn('teacher', course_offer)  # an expandable method field, rendered as its key
+
+        course_offer = self.get({'expand': 'course_offer.semester'})[0]['course_offer']
+        self.assertEqual(course_offer['semester']['term'], self.semester.term_id)
+
+    def test_the_shape_decides_the_queries(self):
+        # only the enrollments, whatever the number of rows
+        with self.assertNumQueries(1):
+            self.get({'fields': 'id,student,course_offer'})
+        # the offer and its course are joined
+        with self.assertNumQueries(1):
+            self.get({'fields': 'id,course_offer.course.code'})
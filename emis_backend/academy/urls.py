@@ -28,13 +28,19 @@ from .views import (
     CourseOfferAPIView,
     CourseOfferListFilteredView,
     CourseEnrollmentView,
+    BulkCourseEnrollmentView,
     MarksheetViewSet,
     CheckCourseEnrollments,
+    CheckCourseEnrollmentsBatch,
     StudentEnrolledCoursesAPIView,
+    StudentEligibleCourseOffersView,
     StudentsInCourseOfferView,
+    CourseOfferRosterView,
     MarksheetListByCourseOffer,
+    GradebookUploadView,
     CourseOfferCommentsView,
     AcademicRecordsAPIView,
+    CohortGPAAPIView,
 )
 
 router = DefaultRouter()
@@ -73,14 +79,20 @@ urlpatterns = [
     path('teacher/<int:teacher_id>/course_offers/', CourseOfferListFilteredView.as_view(), name='course_offers_by_teacher'),
     path('semester/<int:semester_id>/course_offers/', CourseOfferListFilteredView.as_view(), name='course_offers_by_semester'),
     path('course-enrollment/', CourseEnrollmentView.as_view(), name='course_enrollment'),
+    path('course-enrollment/bulk/', BulkCourseEnrollmentView.as_view(), name='course_enrollment_bulk'),
     path('course-enrollment/<int:pk>/', CourseEnrollmentView.as_view(), name='course_enrollment_detail'),
     path('course/check-enrollments/<int:course_id>/<int:student_id>/', CheckCourseEnrollments.as_view(), name='check_enrollments'),
+    path('course/check-enrollments/', CheckCourseEnrollmentsBatch.as_view(), name='check_enrollments_batch'),
     path('student/<int:student_id>/enrollments/', StudentEnrolledCoursesAPIView.as_view(), name='student_enrollments'),
+    path('students/<int:student_id>/eligible-course-offers/', StudentEligibleCourseOffersView.as_view(), name='student_eligible_course_offers'),
     path('course_offer/<int:course_offer_id>/students/', StudentsInCourseOfferView.as_view(), name='students_in_course_offer'),
+    path('course-offer/<int:course_offer_id>/roster/', CourseOfferRosterView.as_view(), name='course-offer-roster'),
     path('course-offer/marksheets/<int:course_offer_id>/', MarksheetListByCourseOffer.as_view(), name='marksheet-list-by-course-offer'),
+    path('course-offer/<int:course_offer_id>/gradebook/', GradebookUploadView.as_view(), name='course-offer-gradebook-upload'),
     path('courseoffer/<int:course_offer_id>/comments/', CourseOfferCommentsView.as_view(), name='course_offer_discussion_comment'),
     path('students/<int:student_id>/academic-records/', AcademicRecordsAPIView.as_view(), name='student_academic_records_for_satff'),
     path('students/<int:student_id>/academic-records/<int:pk>/', AcademicRecordsAPIView.as_view(), name='student_academic_record_for_satff'),
+    path('cohort-gpa/', CohortGPAAPIView.as_view(), name='cohort_gpa'),
     path('', include(router.urls)),
 ]
 
@@ -3,18 +3,33 @@
 from django.core.exceptions import ValidationError
 
 class Marksheet:
+    # Upper limit of every mark, shared by the field validators below and the bulk gradebook upload (academy/gradebook.py)
+    LIMITS = {
+        'attendance': 10,
+        'assignment': 20,
+        'mid_term': 30,
+        'final': 40,
+    }
+    MESSAGES = {
+        'attendance': "Attendance cannot exceed 10.",
+        'assignment': "Assignment score cannot exceed 20.",
+        'mid_term': "Mid-term score cannot exceed 30.",
+        'final': "Final score cannot exceed 40.",
+    }
+    NEGATIVE_MESSAGE = "Marks cannot be negative."
+
     def validate_attendance(value):
-        if value > 10:
-            raise ValidationError("Attendance cannot exceed 10.")
+        if value > Marksheet.LIMITS['attendance']:
+            raise ValidationError(Marksheet.MESSAGES['attendance'])
 
     def validate_assignment(value):
-        if value > 20:
-            raise ValidationError("Assignment score cannot exceed 20.")
+        if value > Marksheet.LIMITS['assignment']:
+            raise ValidationError(Marksheet.MESSAGES['assignment'])
 
     def validate_mid_term(value):
-        if value > 30:
-            raise ValidationError("Mid-term score cannot exceed 30.")
+        if value > Marksheet.LIMITS['mid_term']:
+            raise ValidationError(Marksheet.MESSAGES['mid_term'])
 
     def validate_final(value):
-        if value > 40:
-            raise ValidationError("Final score cannot exceed 40.")
+        if value > Marksheet.LIMITS['final']:
+            raise ValidationError(Marksheet.MESSAGES['final'])
@@ -1,15 +1,21 @@
 # academy/views.py 
 
+import csv
 from authentication.models import User
 from authentication.permissions import IsAdministratorOrStaff, IsAdministratorOrStaffOrReadOnly, IsTeacher, IsStudent
 from authentication.serializers import UserSerializer
-from authentication.utils import TokenDecoderToGetUserRole 
+from authentication.authentication import get_request_profile_id, get_request_role
 from comments.models import Comment
+from core.cache import reference_data_cache, versioned_etag
 from comments.serializers import CommentSerializer, CommentNestedSerializer
 from django.contrib.contenttypes.models import ContentType
-from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import status
-from rest_framework.exceptions import NotFound 
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import get_object_or_404, ListAPIView, GenericAPIView, CreateAPIView, RetrieveUpdateAPIView 
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
@@ -21,6 +27,13 @@ from teacher.models import Teacher
 
 
 
+from .cohort import CohortGPAEngine
+from .dynamic_fields import setup_eager_loading
+from .gradebook import GradebookError, apply_gradebook, get_gradebook_matrix, parse_gradebook_csv
+from .pagination import get_list_response
+from .semesters import current_semesters
+from .roster import ROSTER_COLUMNS, get_roster, iter_roster_csv
+from .registration import RegistrationError, get_course_enrollments, get_eligible_course_offers, register_student, register_students, update_enrollment
 from .models import (
     Designation,
     TermChoices,
@@ -37,12 +50,15 @@ from .models import (
     CourseOffer,
     CourseEnrollment,
     Marksheet,
+    PrerequisiteCycle,
+    StudentAcademicSummary,
 )
 from .serializers import (
     DesignationSerializer,
     InstituteSerializer,
     TermChoicesSerializer,
     DepartmentSerializer,
+    DepartmentNestedSerializer,
     DegreeTypeSerializer,
     TeacherEnrollmentSerializer,
     TeacherEnrollmentViewSerializer,
@@ -62,6 +78,8 @@ from .serializers import (
     CourseEnrollmentSerializer,
     CourseEnrollmentNestedSerializer,
     CourseEnrollmentSemiNestedSerializer,
+    CourseRegistrationSerializer,
+    BulkCourseRegistrationSerializer,
     MarksheetSerializer,
     MarksheetNestedSerializer,
     AcademicRecordsSerializer,
@@ -77,9 +95,8 @@ class DesignationAPIView(APIView):
     def get(self, request):
         permission_classes = [IsAuthenticated]
         try:
-            designations = Designation.objects.all()
-            serializer = DesignationSerializer(designations, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            designations = reference_data_cache.get('designations', lambda: list(DesignationSerializer(Designation.objects.all(), many=True).data))
+            return Response(designations, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -129,9 +146,8 @@ class TermChoicesAPIView(APIView):
     def get(self, request):
         permission_classes = [IsAuthenticated]
         try:
-            term_choices = TermChoices.objects.all()
-            serializer = TermChoicesSerializer(term_choices, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            term_choices = reference_data_cache.get('term_choices', lambda: list(TermChoicesSerializer(TermChoices.objects.all(), many=True).data))
+            return Response(term_choices, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -181,9 +197,8 @@ class InstituteAPIView(APIView):
     def get(self, request):
         permission_classes = [IsAuthenticated]
         try:
-            institutes = Institute.objects.all()
-            serializer = InstituteSerializer(institutes, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            institutes = reference_data_cache.get('institutes', lambda: list(InstituteSerializer(Institute.objects.all(), many=True).data))
+            return Response(institutes, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -233,28 +248,26 @@ class DepartmentAPIView(APIView):
     def get(self, request):
         permission_classes = [IsAuthenticated]
         try:
-            departments = Department.objects.all()
-            serializer = DepartmentSerializer(departments, many=True)
-            # Include the nested representation of the associated Institute object
-            data = serializer.data
-            for department_data in data:
-                institute_id = department_data['institute']
+            institute_id = request.query_params.get('institute')
+            if institute_id and not institute_id.isdigit():
+                return Response({'message': 'Invalid institute.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Institutes are joined and programs counted in the same query 
+            departments = DepartmentNestedSerializer.setup_eager_loading(Department.objects.order_by('id'))
+            if 'fields' in request.query_params or 'expand' in request.query_params:
                 if institute_id:
-                    department_data['institute'] = self.get_institute_data(institute_id)
-                else:
-                    department_data['institute'] = None  # Set to null if institute_id is not present
+                    departments = departments.filter(institute_id=institute_id)
+                serializer = DepartmentNestedSerializer(departments, many=True, context={'request': request})
+                return Response(serializer.data, status=status.HTTP_200_OK)
+
+            # The full shape comes from the reference data cache 
+            data = reference_data_cache.get('departments', lambda: list(DepartmentNestedSerializer(departments, many=True).data))
+            if institute_id:
+                data = [department for department in data if department['institute']['id'] == int(institute_id)]
             return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def get_institute_data(self, institute_id):
-        try:
-            institute = Institute.objects.get(pk=institute_id)
-            serializer = InstituteSerializer(institute)
-            return serializer.data
-        except Institute.DoesNotExist:
-            return None
-
     def post(self, request):
         permission_classes = [IsAdministratorOrStaff]
         try:
@@ -301,9 +314,8 @@ class DegreeTypeAPIView(APIView):
     def get(self, request):
         permission_classes = [IsAuthenticated]
         try:
-            degree_types = DegreeType.objects.all()
-            serializer = DegreeTypeSerializer(degree_types, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            degree_types = reference_data_cache.get('degree_types', lambda: list(DegreeTypeSerializer(DegreeType.objects.all(), many=True).data))
+            return Response(degree_types, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -392,42 +404,44 @@ class TeacherEnrollmentAPIView(APIView):
     
     def get(self, request):
         try:
-            teacher_enrollments = TeacherEnrollment.objects.all()
+            teacher_enrollments = TeacherEnrollmentViewSerializer.setup_eager_loading(TeacherEnrollment.objects.all())
             serializer = TeacherEnrollmentViewSerializer(teacher_enrollments, many=True)
 
             # Retrieve the nested representations of associated models
             data = serializer.data
-            for enrollment_data in data:
-                enrolled_by_id = enrollment_data['enrolled_by']
-                if enrolled_by_id:
-                    enrollment_data['enrolled_by'] = self.get_user_data(enrolled_by_id)
-
-                updated_by_id = enrollment_data['updated_by']
-                if updated_by_id:
-                    enrollment_data['updated_by'] = self.get_user_data(updated_by_id)
-
+            self.inline_user_data(data)
             return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-    def get_user_data(self, user_id):
-        try:
-            user = get_object_or_404(User, pk=user_id)
-            user_data = {
-                'username': user.username,
-                'name': f"{user.first_name} {user.middle_name} {user.last_name}",
-                'email': user.email,
+    def get_user_data(self, user_ids):
+        # brief user info by user id, all of the users in one query
+        users = User.objects.filter(pk__in=set(user_ids)).values('id', 'username', 'first_name', 'middle_name', 'last_name', 'email')
+        return {
+            user['id']: {
+                'username': user['username'],
+                'name': f"{user['first_name']} {user['middle_name']} {user['last_name']}",
+                'email': user['email'],
             }
-            return user_data
-        except User.DoesNotExist:
-            return None
+            for user in users
+        }
+
+
+    def inline_user_data(self, data):
+        # replace the enrolled_by/updated_by ids of serialized enrollments with brief user info 
+        fields = ['enrolled_by', 'updated_by']
+        users = self.get_user_data(enrollment_data[field] for enrollment_data in data for field in fields if enrollment_data[field])
+        for enrollment_data in data:
+            for field in fields:
+                if enrollment_data[field]:
+                    enrollment_data[field] = users.get(enrollment_data[field])
         
     
     # get enrollment info by teacher id 
     def enrollment(self, teacher_id):
         try:
-            enrollments = TeacherEnrollment.objects.filter(teacher=teacher_id)
+            enrollments = TeacherEnrollmentViewSerializer.setup_eager_loading(TeacherEnrollment.objects.filter(teacher=teacher_id))
             if not enrollments:
                 return None
             
@@ -438,15 +452,7 @@ class TeacherEnrollmentAPIView(APIView):
                 # Remove the teacher details
                 del enrollment_data['teacher']
 
-                # get enrolled_by user info 
-                enrolled_by_id = enrollment_data['enrolled_by']
-                if enrolled_by_id:
-                    enrollment_data['enrolled_by'] = self.get_user_data(enrolled_by_id)
-
-                # get updated_by user info 
-                updated_by_id = enrollment_data['updated_by']
-                if updated_by_id:
-                    enrollment_data['updated_by'] = self.get_user_data(updated_by_id)
+            self.inline_user_data(data)
             return data[0]
         
         except Exception as e:
@@ -477,6 +483,7 @@ class EnrolledTeacherRetrieveView(APIView):
 
 
 
+@method_decorator(condition(etag_func=versioned_etag('programs_nested')), name='retrieve')
 class ProgramViewSet(ModelViewSet):
     """
         Handle CRUD operations for Program model using ModelViewSet 
@@ -490,6 +497,16 @@ class ProgramViewSet(ModelViewSet):
             return ProgramNestedSerializer
         return ProgramSerializer 
 
+    @method_decorator(condition(etag_func=versioned_etag('programs_nested')))
+    def list(self, request, *args, **kwargs):
+        # Plain lists come from the reference data cache; pages and ?fields=/?expand= shapes are built per request
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        programs = reference_data_cache.get('programs_nested', lambda: list(
+            ProgramNestedSerializer(Program.objects.select_related('degree_type', 'department'), many=True).data
+        ))
+        return Response(programs)
+
 
 
 class ProgramAPIView(APIView):
@@ -499,18 +516,20 @@ class ProgramAPIView(APIView):
     
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @method_decorator(condition(etag_func=versioned_etag('programs', 'programs_nested')))
     def get(self, request, program_id=None):
         if program_id is not None:
             program = get_object_or_404(Program, id=program_id)
             serializer = ProgramNestedSerializer(program)
             return Response(serializer.data)
 
-        programs = Program.objects.all()
-        serializer = ProgramSerializer(programs, many=True)
-        return Response(serializer.data)
+        programs = reference_data_cache.get('programs', lambda: list(ProgramSerializer(Program.objects.all(), many=True).data))
+        return Response(programs)
 
 
 
+@method_decorator(condition(etag_func=versioned_etag('semesters')), name='list')
+@method_decorator(condition(etag_func=versioned_etag('semesters')), name='retrieve')
 class SemesterViewSet(ModelViewSet):
     """
         Handle CRUD operations for Semester model using ModelViewSet 
@@ -537,16 +556,17 @@ class SemesterViewSet(ModelViewSet):
 
 class OpenSemesterAPIView(APIView):
     """
-        GET running semesters using APIView 
+        GET running semesters (from academy.semesters.current_semesters) using APIView 
     """
 
+    @method_decorator(condition(etag_func=versioned_etag('current_semesters')))
     def get(self, request):
-        semesters = Semester.objects.filter(is_finished=False)
-        serializer = SemesterNestedSerializer(semesters, many=True)
-        return Response(serializer.data)
+        return Response(current_semesters.get_data())
 
 
 
+@method_decorator(condition(etag_func=versioned_etag('courses')), name='list')
+@method_decorator(condition(etag_func=versioned_etag('courses')), name='retrieve')
 class CourseViewSet(ModelViewSet):
     """
         Handle CRUD operations for Course model using ModelViewSet 
@@ -555,20 +575,43 @@ class CourseViewSet(ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
     queryset = Course.objects.all()
 
+    def get_queryset(self):
+        if self.action == 'retrieve':
+            return CourseNestedSerializer.setup_eager_loading(self.queryset)
+        return self.queryset.prefetch_related('programs', 'prerequisites')
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return CourseNestedSerializer
         return CourseSerializer 
 
+    def perform_create(self, serializer):
+        self.save_course(serializer)
+
+    def perform_update(self, serializer):
+        self.save_course(serializer)
+
+    def save_course(self, serializer):
+        # validate_prerequisites checks before the save, a concurrent change can still close a cycle on set()
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except PrerequisiteCycle as e:
+            raise ValidationError({'prerequisites': [str(e)]})
+
 
 
+@method_decorator(condition(etag_func=versioned_etag('batches')), name='list')
+@method_decorator(condition(etag_func=versioned_etag('batches')), name='retrieve')
 class BatchViewSet(ModelViewSet):
     """
         Handle CRUD operations for Batch model using ModelViewSet 
     """
 
     permission_classes = [IsAdministratorOrStaffOrReadOnly, ]
-    queryset = Batch.objects.all()
+    queryset = Batch.objects.select_related('program__degree_type', 'program__department').prefetch_related(
+        Prefetch('sections', queryset=Section.objects.select_related('batch'))
+    )
 
     def get_serializer_class(self):
         if self.action in ['retrieve', 'list']:
@@ -576,13 +619,17 @@ class BatchViewSet(ModelViewSet):
         return BatchSerializer
 
 
+@method_decorator(condition(etag_func=versioned_etag('batches')), name='list')
+@method_decorator(condition(etag_func=versioned_etag('batches')), name='retrieve')
 class BatchActiveViewSet(ModelViewSet):
     """
         GET all active batches by status=True, using ModelViewSet 
     """
 
     permission_classes = [IsAdministratorOrStaffOrReadOnly, ]
-    queryset = Batch.objects.filter(status=True)
+    queryset = Batch.objects.filter(status=True).select_related('program__degree_type', 'program__department').prefetch_related(
+        Prefetch('sections', queryset=Section.objects.select_related('batch'))
+    )
 
     def get_serializer_class(self):
         if self.action in ['retrieve', 'list']:
@@ -597,6 +644,8 @@ class BatchesByProgramAPIView(APIView):
     """
 
     permission_classes = [IsAuthenticated]
+
+    @method_decorator(condition(etag_func=versioned_etag('batches')))
     def get(self, request, program_id):
         batches = Batch.objects.filter(program_id=program_id, status=True)
         serializer = BatchSerializer(batches, many=True)
@@ -604,13 +653,15 @@ class BatchesByProgramAPIView(APIView):
 
 
 
+@method_decorator(condition(etag_func=versioned_etag('batches')), name='list')
+@method_decorator(condition(etag_func=versioned_etag('batches')), name='retrieve')
 class SectionViewSet(ModelViewSet):
     """
         Handle CRUD operations for Section model using ModelViewSet 
     """
 
     permission_classes = [IsAdministratorOrStaffOrReadOnly]
-    queryset = Section.objects.all()
+    queryset = Section.objects.select_related('batch')
     serializer_class = SectionSerializer
 
 
@@ -622,8 +673,9 @@ class SectionByBatchAPIView(APIView):
 
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(condition(etag_func=versioned_etag('batches')))
     def get(self, request, batch_id):
-        sections = Section.objects.filter(batch_id=batch_id)
+        sections = Section.objects.filter(batch_id=batch_id).select_related('batch')
         serializer = SectionSerializer(sections, many=True)
         return Response(serializer.data)
 
@@ -638,7 +690,10 @@ class StudentEnrollmentAPIView(APIView):
 
     def get(self, request, enrollment_id=None, student_id=None):
         if student_id is not None:
-            enrollment = get_object_or_404(StudentEnrollment, student_id=student_id)
+            enrollment = get_object_or_404(
+                StudentEnrollment.objects.select_related('batch_section__batch', 'semester__term', 'enrolled_by', 'updated_by'),
+                student_id=student_id
+            )
             serializer = StudentEnrollmentNestedSerializer(enrollment)
             return Response(serializer.data)
         
@@ -648,8 +703,7 @@ class StudentEnrollmentAPIView(APIView):
             return Response(serializer.data)
 
         enrollments = StudentEnrollment.objects.all()
-        serializer = StudentEnrollmentSerializer(enrollments, many=True)
-        return Response(serializer.data)
+        return get_list_response(self, request, enrollments, StudentEnrollmentSerializer)
 
     def post(self, request):
         serializer = StudentEnrollmentSerializer(data=request.data)
@@ -682,7 +736,9 @@ class StudentEnrollmentAPIView(APIView):
     # get a student's enrollment data by student id  
     def enrollment(self, student_id):
         try:
-            enrollments = StudentEnrollment.objects.filter(student=student_id)
+            enrollments = StudentEnrollment.objects.filter(student=student_id).select_related(
+                'batch_section__batch', 'semester__term', 'enrolled_by', 'updated_by'
+            )
             if not enrollments:
                 return None
             
@@ -707,16 +763,14 @@ class CourseOfferAPIView(APIView):
         if pk:
             # Retrieve a single CourseOffer by its primary key (id)
             try:
-                course_offer = CourseOffer.objects.get(pk=pk)
+                course_offer = CourseOfferNestedSerializer.setup_eager_loading(CourseOffer.objects.all()).get(pk=pk)
                 serializer = CourseOfferNestedSerializer(course_offer)
                 return Response(serializer.data)
             except CourseOffer.DoesNotExist:
                 return Response({'error': 'CourseOffer not found.'}, status=status.HTTP_404_NOT_FOUND)
         else:
-            # Retrieve all CourseOffers
-            course_offers = CourseOffer.objects.all()
-            serializer = CourseOfferNestedSerializer(course_offers, many=True)
-            return Response(serializer.data)
+            # Retrieve all CourseOffers (a cursor page if requested)
+            return get_list_response(self, request, CourseOffer.objects.all(), CourseOfferNestedSerializer)
 
     def post(self, request):
         serializer = CourseOfferSerializer(data=request.data)
@@ -773,7 +827,7 @@ class CourseOfferListFilteredView(APIView):
             return Response({'error': 'Please provide valid id.'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            course_offers = CourseOffer.objects.all()
+            course_offers = CourseOfferNestedSerializer.setup_eager_loading(CourseOffer.objects.all())
 
             if teacher_id:
                 course_offers = course_offers.filter(teacher_id=teacher_id)
@@ -825,38 +879,50 @@ class CourseEnrollmentView(APIView):
     
     def get(self, request, pk=None):
         if pk:
-            course_enrollment = CourseEnrollment.objects.get(pk=pk)
-            serializer = CourseEnrollmentNestedSerializer(course_enrollment)
+            serializer = CourseEnrollmentNestedSerializer(context={'request': request})
+            course_enrollment = setup_eager_loading(CourseEnrollment.objects.all(), serializer).get(pk=pk)
+            serializer = CourseEnrollmentNestedSerializer(course_enrollment, context={'request': request})
         else:
             course_enrollments = CourseEnrollment.objects.all()
-            serializer = CourseEnrollmentNestedSerializer(course_enrollments, many=True)
+            return get_list_response(self, request, course_enrollments, CourseEnrollmentNestedSerializer)
         return Response(serializer.data)
 
     def post(self, request):
-        serializer = CourseEnrollmentSerializer(data=request.data)
-        print('serializer')
-        if serializer.is_valid():
-            course_enrollment = serializer.save()
-            # create a marksheet instance for this enrollment automatically 
-            Marksheet.objects.create(course_enrollment=course_enrollment)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer = CourseRegistrationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Capacity and the regular/non-credit rules are enforced atomically by the registration service
+        try:
+            course_enrollment = register_student(**serializer.validated_data)
+        except RegistrationError as e:
+            return Response({'non_field_errors': [e.message]}, status=e.status_code)
+
+        return Response(CourseEnrollmentSerializer(course_enrollment).data, status=status.HTTP_201_CREATED)
 
     def put(self, request, pk):
         course_enrollment = CourseEnrollment.objects.get(pk=pk)
         serializer = CourseEnrollmentSerializer(course_enrollment, data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            update_enrollment(serializer)
+        except RegistrationError as e:
+            return Response({'non_field_errors': [e.message]}, status=e.status_code)
+        return Response(serializer.data)
 
     def patch(self, request, pk):
         course_enrollment = CourseEnrollment.objects.get(pk=pk)
         serializer = CourseEnrollmentSerializer(course_enrollment, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            update_enrollment(serializer)
+        except RegistrationError as e:
+            return Response({'non_field_errors': [e.message]}, status=e.status_code)
+        return Response(serializer.data)
 
     def delete(self, request, pk):
         course_enrollment = CourseEnrollment.objects.get(pk=pk)
@@ -864,6 +930,34 @@ class CourseEnrollmentView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class BulkCourseEnrollmentView(APIView):
+    """
+        Enroll a list of students, or a whole section/batch, into one or more course offers at once.
+        Returns a per (student, course offer) report; rejected pairs do not stop the others.
+    """
+
+    permission_classes = [IsAdministratorOrStaff]
+
+    def post(self, request):
+        serializer = BulkCourseRegistrationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = register_students(
+            serializer.get_student_ids(),
+            serializer.validated_data['course_offers'],
+            regular=serializer.validated_data['regular'],
+            non_credit=serializer.validated_data['non_credit'],
+        )
+        enrolled = sum(1 for result in results if result['status'] == 'enrolled')
+        response_data = {
+            'enrolled': enrolled,
+            'rejected': len(results) - enrolled,
+            'results': results,
+        }
+        return Response(response_data, status=status.HTTP_201_CREATED if enrolled else status.HTTP_200_OK)
+
+
 
 class StudentEnrolledCoursesAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -879,8 +973,10 @@ class StudentEnrolledCoursesAPIView(APIView):
             if not enrollments_for_student.exists():
                 raise NotFound('No course enrollments found for the specified student.')
 
-            # Serialize the enrollments data
-            serializer = CourseEnrollmentNestedSerializer(enrollments_for_student, many=True)
+            # Serialize the enrollments data, loading only the relations of the requested ?fields=/?expand= shape
+            serializer = CourseEnrollmentNestedSerializer(many=True, context={'request': request})
+            enrollments_for_student = setup_eager_loading(enrollments_for_student, serializer)
+            serializer = CourseEnrollmentNestedSerializer(enrollments_for_student, many=True, context={'request': request})
 
             return Response(serializer.data)
         
@@ -917,6 +1013,91 @@ class CheckCourseEnrollments(APIView):
 
 
 
+class CheckCourseEnrollmentsBatch(APIView):
+    """
+        Check many (course, student) pairs with one query, either:
+        - many courses of one student: ?student=<id>&courses=<id>,<id>,...
+        - many students of one course: ?course=<id>&students=<id>,<id>,...
+        Returns {"student": <id>, "enrollments": {"<course id>": [...], ...}} (or "course" and student ids as keys),
+        with every requested id as a key and an empty list if there is no enrollment.
+    """
+
+    permission_classes = [IsAuthenticated]
+    max_ids = 1000
+
+    def parse_ids(self, value):
+        try:
+            ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+        except ValueError:
+            return None
+        return ids if 0 < len(ids) <= self.max_ids else None
+
+    def get(self, request):
+        params = request.query_params
+        if 'student' in params and 'courses' in params:
+            owner, owner_key, ids_key = params['student'], 'student', 'courses'
+        elif 'course' in params and 'students' in params:
+            owner, owner_key, ids_key = params['course'], 'course', 'students'
+        else:
+            return Response({'error': "Provide 'student' and 'courses', or 'course' and 'students'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = self.parse_ids(params[ids_key])
+        if not owner.isdigit() or ids is None:
+            return Response({'error': f'Invalid {owner_key} or {ids_key} (comma separated ids, at most {self.max_ids}).'}, status=status.HTTP_400_BAD_REQUEST)
+        owner = int(owner)
+
+        if owner_key == 'student':
+            student_ids, course_ids = [owner], ids
+        else:
+            student_ids, course_ids = ids, [owner]
+        if get_request_role(request) == 'student' and (owner_key != 'student' or get_request_profile_id(request) != owner):
+            return Response({'error': 'Students can only check their own enrollments.'}, status=status.HTTP_403_FORBIDDEN)
+
+        enrollments = get_course_enrollments(student_ids, course_ids)
+        if owner_key == 'student':
+            data = {str(course_id): enrollments.get((owner, course_id), []) for course_id in ids}
+        else:
+            data = {str(student_id): enrollments.get((student_id, owner), []) for student_id in ids}
+        return Response({owner_key: owner, 'enrollments': data})
+
+
+
+class StudentEligibleCourseOffersView(APIView):
+    """
+        Get the course offers of the open semesters (or ?semester=<id>) that a student can register for: 
+        the semester is open for the student's program, prerequisites passed, not already enrolled as regular, seats left.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, student_id):
+        if get_request_role(request) == 'student' and get_request_profile_id(request) != student_id:
+            return Response({'error': 'Students can only view their own eligible courses.'}, status=status.HTTP_403_FORBIDDEN)
+        get_object_or_404(Student.objects.only('id'), pk=student_id)
+
+        semester_ids = current_semesters.get_open_semester_ids()
+        semester_id = request.query_params.get('semester')
+        if semester_id:
+            if not semester_id.isdigit():
+                return Response({'error': 'Invalid semester.'}, status=status.HTTP_400_BAD_REQUEST)
+            semester_ids = [int(semester_id)] if current_semesters.is_open(int(semester_id)) else []
+
+        # only the semesters open for the program of one of the student's active enrollments
+        program_ids = set(
+            StudentEnrollment.objects.filter(student_id=student_id, is_active=True)
+            .values_list('batch_section__batch__program_id', flat=True)
+        )
+        semester_ids = [semester_id for semester_id in semester_ids if current_semesters.get_open_programs(semester_id) & program_ids]
+
+        course_offer_ids = get_eligible_course_offers(student_id, semester_ids)
+        course_offers = CourseOfferNestedSerializer.setup_eager_loading(
+            CourseOffer.objects.filter(pk__in=course_offer_ids)
+        ).order_by('semester_id', 'course__acronym', 'course__code')
+        serializer = CourseOfferNestedSerializer(course_offers, many=True)
+        return Response(serializer.data)
+
+
+
 class MarksheetViewSet(ModelViewSet):
     """
         Handle CRUD operations for Marksheet model using ModelViewSet    
@@ -936,8 +1117,12 @@ class StudentsInCourseOfferView(APIView):
     """
     def get(self, request, course_offer_id):
         try:
-            # Retrieve all CourseEnrollment objects for the given course_offer_id
-            course_enrollments = CourseEnrollment.objects.filter(course_offer_id=course_offer_id)
+            # Retrieve all CourseEnrollment objects for the given course_offer_id, with their students and users in the same query
+            course_enrollments = (
+                CourseEnrollment.objects.filter(course_offer_id=course_offer_id)
+                .select_related('student__user')
+                .prefetch_related('student__user__groups', 'student__user__user_permissions')
+            )
             
             # Retrieve the student objects from the CourseEnrollment objects
             enrolled_students = [enrollment.student for enrollment in course_enrollments]
@@ -952,6 +1137,30 @@ class StudentsInCourseOfferView(APIView):
 
 
 
+class CourseOfferRosterView(APIView):
+    """
+        GET the class roster of a course offer: one row per enrolled student, from a single joined query.
+        ?export=csv streams the roster as a CSV download instead of JSON.
+    """
+
+    permission_classes = [IsAdministratorOrStaff | IsTeacher]
+
+    def get(self, request, course_offer_id):
+        course_offer = get_object_or_404(CourseOffer, pk=course_offer_id)
+        if get_request_role(request) == 'teacher' and (course_offer.teacher_id is None or course_offer.teacher_id != get_request_profile_id(request)):
+            return Response({'error': 'Only the teacher of this course offer can see its roster.'}, status=status.HTTP_403_FORBIDDEN)
+
+        roster = get_roster(course_offer.id)
+        if request.query_params.get('export') == 'csv':
+            response = StreamingHttpResponse(iter_roster_csv(roster), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="course-offer-{course_offer.id}-roster.csv"'
+            return response
+
+        columns = list(ROSTER_COLUMNS)
+        return Response([dict(zip(columns, row)) for row in roster])
+
+
+
 class MarksheetListByCourseOffer(ListAPIView):
     permission_classes = [IsAuthenticated]
     
@@ -966,6 +1175,55 @@ class MarksheetListByCourseOffer(ListAPIView):
         return Marksheet.objects.filter(course_enrollment__course_offer_id=course_offer_id)
 
 
+class GradebookUploadView(APIView):
+    """
+        GET the marks of a whole course offer as columns: {"marksheet": [...], "student": [...], "name": [...], "total": [...], ...}
+        POST (upload) the marks of a whole course offer in one request, as JSON or as a CSV file.
+        JSON: {"marks": [{"student": 12, "attendance": 9, "assignment": 18, "mid_term": 25, "final": 35}, ...]}
+        CSV: multipart 'file' with a header row, e.g. student,attendance,assignment,mid_term,final
+        Rows can use 'marksheet' (id) instead of 'student'. Nothing is saved if any row is invalid.
+    """
+
+    permission_classes = [IsAdministratorOrStaff | IsTeacher]
+
+    def get_course_offer(self, request, course_offer_id):
+        # Teachers can only work with the gradebook of their own course offers, returns None otherwise 
+        course_offer = get_object_or_404(CourseOffer, pk=course_offer_id)
+        if get_request_role(request) == 'teacher' and (course_offer.teacher_id is None or course_offer.teacher_id != get_request_profile_id(request)):
+            return None
+        return course_offer
+
+    def get(self, request, course_offer_id):
+        course_offer = self.get_course_offer(request, course_offer_id)
+        if course_offer is None:
+            return Response({'error': 'Only the teacher of this course offer can see its marks.'}, status=status.HTTP_403_FORBIDDEN)
+
+        columns = get_gradebook_matrix(course_offer)
+        return Response({'course_offer': course_offer.id, 'is_complete': course_offer.is_complete, 'count': len(columns['marksheet']), **columns})
+
+    def post(self, request, course_offer_id):
+        course_offer = self.get_course_offer(request, course_offer_id)
+        if course_offer is None:
+            return Response({'error': 'Only the teacher of this course offer can upload its marks.'}, status=status.HTTP_403_FORBIDDEN)
+
+        if 'file' in request.FILES:
+            try:
+                rows = parse_gradebook_csv(request.FILES['file'])
+            except (UnicodeDecodeError, csv.Error):
+                return Response({'error': 'Invalid CSV file.'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            rows = request.data.get('marks') if isinstance(request.data, dict) else request.data
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                return Response({'error': "Expected a list of rows in 'marks'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            updated = apply_gradebook(course_offer.id, rows)
+        except GradebookError as e:
+            return Response({'error': str(e), 'rows': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'message': f'{updated} marksheet(s) updated.', 'updated': updated}, status=status.HTTP_200_OK)
+
+
 
 class AcademicRecordsAPIView(APIView):    
     """
@@ -977,49 +1235,31 @@ class AcademicRecordsAPIView(APIView):
     def get(self, request, student_id):
         permission_classes = [IsAuthenticated]
         
-        authorization_header = request.META.get('HTTP_AUTHORIZATION')
-        role = TokenDecoderToGetUserRole.decode_token(authorization_header)
+        # Optionally limit the records to one semester (?semester=<id>)
+        semester_id = request.query_params.get('semester')
+        if semester_id and not semester_id.isdigit():
+            return Response({'error': 'Invalid semester.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        role = get_request_role(request)
 
         # Check if the user role is 'student' and include published records in that case
-        if role == 'student':
-            academic_records = Marksheet.objects.filter(
-                course_enrollment__student_id=student_id, 
-                is_published=True
-            )
-        else:
-            # For other roles, include all records regardless of the 'is_published' flag
-            academic_records = Marksheet.objects.filter(
-                course_enrollment__student_id=student_id
-            )
-              
-        # Retrieve all academic records for the specified student
-        # academic_records = Marksheet.objects.filter(course_enrollment__student_id=student_id)
-        serializer = AcademicRecordsSerializer(academic_records, many=True)
-        
-        # Get total credit hours and grade points
-        total_credit_hours = 0.0
-        total_grade_points = 0.0
-        
-        for record in serializer.data:
-            # Check if the course is a credit (not a non-credit) course (non_credit is False)
-            if not record['course_enrollment']['non_credit']:
-                # Check if 'grade_point' exists and is not None, and meets the minimum requirement (grade_point >= 2)
-                if (
-                    'grade_point' in record
-                    and record['grade_point'] is not None
-                    and record['grade_point'] >= 2
-                ):
-                    # Access credit_hours from the related models
-                    credit_hours = record['course_enrollment']['course_offer']['course']['credit']
-                    total_credit_hours += credit_hours
-                    total_grade_points += float(record['grade_point']) * credit_hours
+        published_only = role == 'student'
+        academic_records = Marksheet.objects.filter(course_enrollment__student_id=student_id)
+        if published_only:
+            academic_records = academic_records.filter(is_published=True)
+
+        if semester_id:
+            academic_records = academic_records.filter(course_enrollment__course_offer__semester_id=semester_id)
+
+        serializer = AcademicRecordsSerializer(AcademicRecordsSerializer.setup_eager_loading(academic_records), many=True)
         
-        # Calculate average CGPA
-        average_cgpa_raw = total_grade_points / total_credit_hours if total_credit_hours > 0 else 0.0
+        # Total credit hours and CGPA come from the maintained summary instead of being recomputed from the records
+        summary = StudentAcademicSummary.get_summary(student_id)
+        total_credit_hours = summary.get_credit_hours(published_only) if summary else 0.0
+        average_cgpa_raw = summary.get_cgpa(published_only) if summary else 0.0
         # Format average_cgpa_raw with up to 3 decimal places
         average_cgpa = "{:.3f}".format(average_cgpa_raw)
         
-        
         # Add the average CGPA, Academic Records, and Total Credit Hours to the response data
         response_data = {
             'academic_records': serializer.data,
@@ -1027,6 +1267,11 @@ class AcademicRecordsAPIView(APIView):
             'total_credit_hours': total_credit_hours,
         }
 
+        if semester_id:
+            semester_summary = StudentAcademicSummary.get_summary(student_id, int(semester_id))
+            response_data['semester_cgpa'] = "{:.3f}".format(semester_summary.get_cgpa(published_only) if semester_summary else 0.0)
+            response_data['semester_credit_hours'] = semester_summary.get_credit_hours(published_only) if semester_summary else 0.0
+
         return Response(response_data, status=status.HTTP_200_OK)
 
 
@@ -1047,3 +1292,24 @@ class AcademicRecordsAPIView(APIView):
 
 
 
+class CohortGPAAPIView(APIView):
+    """
+    Get credit hours, CGPA and rank of every student in a cohort in one request.
+    Filter by any combination of ?section=, ?batch=, ?program= and ?semester= (the latter adds term GPA and rank).
+    """
+
+    permission_classes = [IsAdministratorOrStaff]
+
+    def get(self, request):
+        filters = {key: request.query_params.get(key) for key in ('section', 'batch', 'program', 'semester')}
+        if not any(filters.values()):
+            return Response({'error': 'Please provide a section, batch, program or semester id.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            filters = {key: int(value) for key, value in filters.items() if value}
+        except ValueError:
+            return Response({'error': 'Please provide valid id.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        published_only = request.query_params.get('published_only', '').lower() in ('1', 'true')
+        results = CohortGPAEngine(published_only=published_only, **filters).compute()
+        return Response({'count': len(results), 'results': results}, status=status.HTTP_200_OK)
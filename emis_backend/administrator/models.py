@@ -2,6 +2,7 @@
 
 from django.db import models
 from authentication.models import User 
+from core.cache import get_profile_key, reference_data_cache
 from django.db.models.signals import post_migrate
 from django.dispatch import receiver 
 
@@ -28,7 +29,10 @@ class Administrator(models.Model):
     history = models.JSONField(blank=True, null=True)
     user = models.OneToOneField(User, on_delete=models.CASCADE, blank=True, null=True)
     designation = models.CharField(max_length=99, blank=True, null=True)
-    
+
+
+reference_data_cache.register(lambda administrator: get_profile_key(administrator.user_id), Administrator)
+
 
 
 #####################################################################
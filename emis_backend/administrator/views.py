@@ -2,7 +2,10 @@
 
 import json
 from datetime import date
+from core.cache import get_reference_profile_key, versioned_etag
 from django.core import serializers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.http import HttpResponse, JsonResponse
 from rest_framework import status, generics, viewsets
 from rest_framework.mixins import DestroyModelMixin
@@ -70,6 +73,7 @@ class CustomJSONEncoder(serializers.json.DjangoJSONEncoder):
 class GetAdministratorView(APIView):
     permission_classes = [IsAdministrator]
     
+    @method_decorator(condition(etag_func=versioned_etag(get_reference_profile_key)))
     def get(self, request):
         user_id = request.GET.get('reference')
         try:
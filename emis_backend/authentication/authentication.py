@@ -0,0 +1,88 @@
+# authentication/authentication.py
+
+from collections import namedtuple
+from types import MappingProxyType
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .cache import user_cache
+from .tokens import PROFILE_ID_CLAIM, ROLE_CLAIM, get_profile_id
+
+
+# profile_id is None when the token has no profile claim (issued before RoleRefreshToken, or the user has no profile yet)
+AuthContext = namedtuple('AuthContext', ['user_id', 'role', 'profile_id', 'claims'])
+
+
+def build_auth_context(user, token):
+    # role: always the user row, never the claim (the claim is for the client's display)
+    claims = MappingProxyType(dict(token.payload))
+    return AuthContext(
+        user_id=user.id,
+        role=user.role,
+        profile_id=claims.get(PROFILE_ID_CLAIM),
+        claims=claims,
+    )
+
+
+class ContextJWTAuthentication(JWTAuthentication):
+    """
+        JWTAuthentication that also attaches request.auth_context: an immutable AuthContext built once per request
+        from the token it has already validated. Views read the user id and profile id from it instead of decoding
+        the Authorization header again. The role is taken from the user row; a token whose role claim no longer
+        matches it (the user was demoted or reassigned) is rejected.
+        The user is loaded through the user cache (authentication/cache.py), so a warm request makes no query.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None:
+            return None
+        user, token = result
+        # the role (and with it the profile id) changed since the token was issued: log in again
+        if ROLE_CLAIM in token and token[ROLE_CLAIM] != user.role:
+            raise AuthenticationFailed('Token role does not match the user', code='token_role_mismatch')
+        # request is the DRF Request, keep the context on the underlying HttpRequest as well
+        request._request.auth_context = build_auth_context(user, token)
+        return user, token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        # a miss loads the user with the checks of JWTAuthentication (not found, inactive), which are not cached
+        user = user_cache.get(user_id, lambda: super(ContextJWTAuthentication, self).get_user(validated_token))
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+
+def get_auth_context(request):
+    """
+        Return the AuthContext of the request, or None if it is not authenticated with a JWT.
+    """
+    request.user  # DRF authenticates lazily, make sure it has run
+    # a DRF Request reads missing attributes from the HttpRequest
+    return getattr(request, 'auth_context', None)
+
+
+def get_request_role(request):
+    """
+        Return the role of the authenticated user (from the user row, not the token claims), or None.
+    """
+    return getattr(request.user, 'role', None)
+
+
+def get_request_profile_id(request):
+    """
+        Return the role profile id (Student.id for a student, Teacher.id for a teacher, ...) of the authenticated user.
+        Read from the token claims, with a query for older tokens or a profile created after the token was issued.
+    """
+    auth_context = get_auth_context(request)
+    if auth_context is not None and auth_context.profile_id is not None:
+        return auth_context.profile_id
+    if not request.user or not request.user.is_authenticated:
+        return None
+    return get_profile_id(request.user)
@@ -0,0 +1,80 @@
+# authentication/cache.py
+
+import copy
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+
+
+class UserCache:
+    """
+        Cache of authenticated users by id, so that JWT authentication does not load the User row on every request.
+
+        Entries expire after settings.AUTH_USER_CACHE_TTL seconds and are invalidated explicitly whenever the user is
+        saved or deleted (password change, deactivation, role change, ...; receivers in authentication/models.py).
+        Users are kept in process memory. If settings.AUTH_USER_CACHE names a cache alias (e.g. a shared Redis),
+        they are kept there instead, so an invalidation reaches every worker at once; with process memory
+        the other workers see a change within the TTL. The shared cache gets the field values without the password hash;
+        users rebuilt from them load the password from the database when it is accessed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = {}  # user id -> (expires at, user)
+
+    def _get_shared_cache(self):
+        alias = getattr(settings, 'AUTH_USER_CACHE', None)
+        return caches[alias] if alias else None
+
+    def _get_ttl(self):
+        return getattr(settings, 'AUTH_USER_CACHE_TTL', 30)
+
+    def get(self, user_id, loader):
+        """
+            Return the user with the given id, calling loader() to load it when it is not cached (or expired).
+            Every caller gets its own copy, changes to it do not leak into the cache.
+        """
+        shared_cache = self._get_shared_cache()
+        if shared_cache is not None:
+            values = shared_cache.get(f'auth_user:{user_id}')
+            if values is not None:
+                return self._from_values(values)
+            user = loader()
+            shared_cache.set(f'auth_user:{user_id}', self._to_values(user), timeout=self._get_ttl())
+            return user
+
+        entry = self._local.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return copy.copy(entry[1])
+        user = loader()
+        with self._lock:
+            self._local[user_id] = (time.monotonic() + self._get_ttl(), copy.copy(user))
+        return user
+
+    @staticmethod
+    def _to_values(user):
+        return {field.attname: getattr(user, field.attname) for field in user._meta.concrete_fields if field.attname != 'password'}
+
+    @staticmethod
+    def _from_values(values):
+        from .models import User
+
+        # the password is a deferred field: save() leaves it alone, reading it loads it
+        return User.from_db(router.db_for_read(User), list(values), list(values.values()))
+
+    def invalidate(self, user_id):
+        self._delete(user_id)
+        # again on commit: a request in another transaction may have cached the old row in between
+        transaction.on_commit(lambda: self._delete(user_id))
+
+    def _delete(self, user_id):
+        shared_cache = self._get_shared_cache()
+        if shared_cache is not None:
+            shared_cache.delete(f'auth_user:{user_id}')
+        with self._lock:
+            self._local.pop(user_id, None)
+
+
+user_cache = UserCache()
@@ -0,0 +1,75 @@
+# authentication/management/commands/auth_context_benchmark.py
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from authentication.authentication import ContextJWTAuthentication, get_request_role
+from authentication.models import User
+from authentication.tokens import RoleRefreshToken
+from core.benchmarking import format_report
+
+
+def decode_role(request):
+    # the former path: decode the Authorization header again and load the user for the role
+    access_token = AccessToken(request.headers['Authorization'].split(' ')[1])
+    return User.objects.get(id=access_token[api_settings.USER_ID_CLAIM]).role
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark resolving the role of an authenticated request: "
+        "the former path (JWTAuthentication, then the header is decoded again and the user loaded for the role) "
+        "against ContextJWTAuthentication (the cached user, read once per request). "
+        "Reports latency and queries per request; the database is only read."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Number of requests per path.')
+        parser.add_argument('--username', help='User to authenticate as (default: the first active user).')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1.')
+        users = User.objects.filter(is_active=True)
+        user = users.filter(username=options['username']).first() if options['username'] else users.order_by('id').first()
+        if user is None:
+            raise CommandError('No such active user.')
+
+        # tokens issued before the role claim existed went through the decoder and a user query
+        legacy_token = RefreshToken.for_user(user).access_token
+        token = RoleRefreshToken.for_user(user).access_token
+        paths = [
+            ('decoder', JWTAuthentication(), legacy_token, decode_role),
+            ('auth_context', ContextJWTAuthentication(), token, get_request_role),
+        ]
+
+        self.stdout.write(f'User: {user.username} ({user.role}), {options["requests"]} requests per path')
+        results = {}
+        for name, authenticator, access_token, resolve_role in paths:
+            latencies, queries = self.run(authenticator, f'Bearer {access_token}', resolve_role, options['requests'])
+            results[name] = (latencies, queries)
+            self.stdout.write(format_report(name, latencies, {'queries/request': queries}))
+
+        (legacy_latencies, legacy_queries), (latencies, queries) = results['decoder'], results['auth_context']
+        saved = (sum(legacy_latencies) - sum(latencies)) / len(latencies) * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f'Saving per request: {saved:.3f} ms, {legacy_queries - queries:.2f} queries'
+        ))
+
+    def run(self, authenticator, authorization, resolve_role, count):
+        factory = APIRequestFactory()
+        latencies = []
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(count):
+                request = Request(factory.get('/', HTTP_AUTHORIZATION=authorization), authenticators=[authenticator])
+                started = time.perf_counter()
+                request.user
+                resolve_role(request)
+                latencies.append(time.perf_counter() - started)
+        return sorted(latencies), len(context.captured_queries) / count
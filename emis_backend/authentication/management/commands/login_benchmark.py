@@ -0,0 +1,57 @@
+# authentication/management/commands/login_benchmark.py
+
+import time
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from authentication.views import LoginView
+from core.benchmarking import format_report
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark LoginView (authentication, session, tokens and the role profile) for one or more users. "
+        "Reports p50/p95/p99 latency and queries per login for every user. "
+        "Everything the logins write (sessions, last_login, outstanding tokens) is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'credentials', nargs='+', metavar='username:password',
+            help='Users to log in as, e.g. an administrator, a staff, a teacher and a student.'
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Number of logins per user.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1.')
+        credentials = []
+        for credential in options['credentials']:
+            username, separator, password = credential.partition(':')
+            if not separator:
+                raise CommandError(f'Expected username:password, got {credential!r}.')
+            credentials.append((username, password))
+
+        view = LoginView.as_view()
+        with transaction.atomic():
+            for username, password in credentials:
+                latencies, queries = self.run(view, username, password, options['requests'])
+                self.stdout.write(format_report(username, latencies, {'queries/login': queries}))
+            transaction.set_rollback(True)
+
+    def run(self, view, username, password, count):
+        factory = APIRequestFactory()
+        session_middleware = SessionMiddleware(lambda request: None)
+        latencies = []
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(count):
+                request = factory.post('/api/login/', {'username': username, 'password': password}, format='json')
+                session_middleware.process_request(request)
+                started = time.perf_counter()
+                response = view(request)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f'Login as {username} failed: {response.status_code} {response.data}')
+        return sorted(latencies), len(context.captured_queries) / count
@@ -2,6 +2,9 @@
 
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.signals import post_delete
+from core.cache import get_profile_key, reference_data_cache
+from .cache import user_cache
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -16,8 +19,23 @@ class User(AbstractUser):
     email_verified = models.BooleanField(default=False)
 
     def save(self, *args, **kwargs):
-        if self.pk:  # Check if the object is already in the database
+        update_fields = kwargs.get('update_fields')
+        # Check if the object is already in the database (and the email may be saved, unlike update_last_login at login)
+        if self.pk and (update_fields is None or 'email' in update_fields):
             original_email = User.objects.get(pk=self.pk).email
             if self.email != original_email:  # Email field has changed
                 self.email_verified = False
         super().save(*args, **kwargs)
+        # password change, deactivation, role change, ...: authentication must load the new row
+        user_cache.invalidate(self.pk)
+
+
+# the user row is part of every profile response
+reference_data_cache.register(lambda user: get_profile_key(user.pk), User)
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+post_delete.connect(invalidate_cached_user, sender=User)
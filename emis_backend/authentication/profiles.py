@@ -0,0 +1,114 @@
+# authentication/profiles.py
+
+from academy.models import TeacherEnrollment
+from academy.serializers import TeacherEnrollmentViewSerializer
+from administrator.models import Administrator
+from administrator.serializers import AdministratorSerializer
+from staff.models import Staff
+from staff.serializers import StaffSerializer
+from student.models import Student
+from student.serializers import StudentSerializer
+from teacher.models import Teacher
+from teacher.serializers import TeacherSerializer
+
+
+def get_brief_user(user):
+    # same shape as the enrolled_by/updated_by info of TeacherEnrollmentAPIView
+    if user is None:
+        return None
+    return {
+        'username': user.username,
+        'name': f"{user.first_name} {user.middle_name} {user.last_name}",
+        'email': user.email,
+    }
+
+
+def serialize_permissions(permissions):
+    return [
+        {
+            'id': permission.id,
+            'codename': permission.codename,
+            'name': permission.name
+        }
+        for permission in permissions
+    ]
+
+
+def get_staff_profile(user):
+    # 4 queries: the staff, its groups, the permissions of the groups and its direct permissions
+    staff = (
+        Staff.objects.filter(user=user)
+        .prefetch_related('permission_groups__permissions', 'permissions')
+        .first()
+    )
+    if staff is None:
+        return None
+
+    staff_data = StaffSerializer(staff).data
+    staff_data['permission_groups'] = [
+        {
+            'id': group.id,
+            'name': group.name,
+            'permissions': serialize_permissions(group.permissions.all())
+        }
+        for group in staff.permission_groups.all()
+    ]
+    staff_data['permissions'] = serialize_permissions(staff.permissions.all())
+    return staff_data
+
+
+def get_teacher_enrollment(teacher):
+    """
+        Return the (first) enrollment of a teacher as TeacherEnrollmentViewSerializer data without the teacher,
+        with enrolled_by/updated_by as brief user info; None if the teacher is not enrolled.
+        3 queries: the enrollment with both users, its designations and its departments.
+    """
+    enrollment = (
+        TeacherEnrollment.objects.filter(teacher=teacher)
+        .select_related('enrolled_by', 'updated_by')
+        .prefetch_related('designations', 'departments')
+        .order_by('id')
+        .first()
+    )
+    if enrollment is None:
+        return None
+
+    enrollment.teacher = teacher  # already loaded, with its user
+    enrollment_data = TeacherEnrollmentViewSerializer(enrollment).data
+    del enrollment_data['teacher']
+    enrollment_data['enrolled_by'] = get_brief_user(enrollment.enrolled_by)
+    enrollment_data['updated_by'] = get_brief_user(enrollment.updated_by)
+    return enrollment_data
+
+
+def load_profile(user, with_enrollment=False):
+    """
+        Return the role specific data of a user for the login and get-user responses: {'profile': ...} and,
+        for a teacher with with_enrollment, {'enrollment': ...}. Empty if the user has no profile.
+        The number of queries is fixed for every role: 1 for an administrator or a student, 4 for a staff,
+        1 for a teacher (4 with the enrollment).
+    """
+    data = {}
+    if user.role == 'administrator':
+        administrator = Administrator.objects.filter(user=user).first()
+        if administrator is not None:
+            data['profile'] = AdministratorSerializer(administrator).data
+
+    elif user.role == 'staff':
+        staff_data = get_staff_profile(user)
+        if staff_data is not None:
+            data['profile'] = staff_data
+
+    elif user.role == 'teacher':
+        teacher = Teacher.objects.filter(user=user).select_related('user').first()
+        if teacher is not None:
+            data['profile'] = TeacherSerializer(teacher).data
+            if with_enrollment:
+                data['enrollment'] = get_teacher_enrollment(teacher)
+
+    elif user.role == 'student':
+        student = Student.objects.filter(user=user).first()
+        if student is not None:
+            data['profile'] = StudentSerializer(student).data
+
+    return data
@@ -1,3 +1,54 @@
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import User
+from .tokens import ROLE_CLAIM, RoleRefreshToken
 
-# Create your tests here.
+
+class RoleClaimTests(TestCase):
+    """
+        ContextJWTAuthentication: the role claim of a token must match the role of the user row.
+    """
+
+    url = '/api/academy/course-enrollment/'
+
+    def setUp(self):
+        self.user = User.objects.create(username='role-test', role='administrator')
+        self.client = APIClient()
+
+    def get(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.client.get(self.url)
+
+    def assertRejected(self, response, code=None):
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        if code is not None:
+            self.assertEqual(response.data['detail'].code, code)
+
+    def test_token_of_the_current_role_is_accepted(self):
+        refresh = RoleRefreshToken.for_user(self.user)
+        self.assertEqual(refresh.access_token[ROLE_CLAIM], 'administrator')
+        self.assertEqual(self.get(refresh.access_token).status_code, status.HTTP_200_OK)
+
+    def test_token_issued_before_a_role_change_is_rejected(self):
+        refresh = RoleRefreshToken.for_user(self.user)
+        self.assertEqual(self.get(refresh.access_token).status_code, status.HTTP_200_OK)
+
+        self.user.role = 'student'
+        self.user.save()
+
+        self.assertRejected(self.get(refresh.access_token), 'token_role_mismatch')
+        # an access token refreshed from the old refresh token carries the old claim as well
+        response = self.client.post('/api/token/refresh/', {'refresh': str(refresh)}, format='json')
+        self.assertRejected(self.get(response.data['access']), 'token_role_mismatch')
+
+        # a new login issues a token with the new role
+        self.assertEqual(self.get(RoleRefreshToken.for_user(self.user).access_token).status_code, status.HTTP_200_OK)
+
+    def test_token_of_a_deactivated_user_is_rejected(self):
+        access = RoleRefreshToken.for_user(self.user).access_token
+        self.assertEqual(self.get(access).status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertRejected(self.get(access))
@@ -0,0 +1,50 @@
+# authentication/tokens.py
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+ROLE_CLAIM = 'role'
+PROFILE_ID_CLAIM = 'profile_id'
+
+
+def get_profile_model(role):
+    # The model that holds the profile of each role
+    from administrator.models import Administrator
+    from staff.models import Staff
+    from student.models import Student
+    from teacher.models import Teacher
+
+    return {
+        'administrator': Administrator,
+        'staff': Staff,
+        'teacher': Teacher,
+        'student': Student,
+    }.get(role)
+
+
+def get_profile_id(user):
+    """
+        Return the id of the Administrator/Staff/Teacher/Student row of the user (by role), or None.
+    """
+    model = get_profile_model(user.role)
+    if model is None:
+        return None
+    return model.objects.filter(user_id=user.id).values_list('id', flat=True).first()
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+        Refresh token with the role and the role profile id of the user as signed claims.
+        The access tokens made from it (at login and by token/refresh/) copy the claims.
+        The role claim is for the client's display: authorization uses the user row, and ContextJWTAuthentication
+        rejects a token whose role claim no longer matches it. Ownership checks read the profile id without a query.
+    """
+
+    @classmethod
+    def for_user(cls, user, profile_id=None):
+        # profile_id: pass it when the profile is already loaded, to skip the lookup
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[PROFILE_ID_CLAIM] = profile_id if profile_id is not None else get_profile_id(user)
+        return token
+
@@ -1,13 +1,11 @@
 # authentication/views.py
 
 import jwt
-from academy.views import TeacherEnrollmentAPIView
-from administrator.models import Administrator
-from administrator.serializers import AdministratorSerializer
 from authentication.models import User
 from authentication.permissions import IsAdministrator
+from authentication.profiles import load_profile
 from authentication.serializers import UserSerializer
-from authentication.utils import TokenDecoderToGetUserId
+from authentication.tokens import RoleRefreshToken
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.hashers import check_password
 from email_handler.views import EmailVerificationDirectView
@@ -20,12 +18,6 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import ModelViewSet
 # from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
 from rest_framework_simplejwt.tokens import RefreshToken
-from staff.models import Staff
-from staff.serializers import StaffSerializer
-from teacher.models import Teacher
-from teacher.serializers import TeacherSerializer
-from student.models import Student
-from student.serializers import StudentSerializer
 
 
 class UserViewSet(ModelViewSet):
@@ -44,7 +36,9 @@ class LoginView(APIView):
         if user is not None:
             if user.email_verified:
                 login(request, user)
-                refresh = RefreshToken.for_user(user)
+                # role specific profile (and the teacher's enrollment) in a fixed number of queries
+                profile_data = load_profile(user, with_enrollment=True)
+                refresh = RoleRefreshToken.for_user(user, profile_id=profile_data.get('profile', {}).get('id'))
 
                 user_data = {
                     'message': 'Login successful',
@@ -53,67 +47,7 @@ class LoginView(APIView):
                     'user': UserSerializer(user).data
                 }
 
-                if user.role == 'administrator':
-                    administrator = Administrator.objects.filter(user=user).first()
-                    if administrator is not None:
-                        # Add administrator data to the user_data
-                        user_data['profile'] = AdministratorSerializer(administrator).data
-
-                if user.role == 'staff':
-                    staff = Staff.objects.filter(user=user).first()
-                    if staff is not None:
-                        # Add staff data to the user_data
-                        staff_data = StaffSerializer(staff).data
-                        
-                        # Add permission groups data
-                        permission_groups = staff.permission_groups.all()
-                        group_data = [
-                            {
-                                'id': group.id,
-                                'name': group.name,
-                                'permissions': [
-                                    {
-                                        'id': permission.id,
-                                        'codename': permission.codename,
-                                        'name': permission.name
-                                    }
-                                    for permission in group.permissions.all()
-                                ]
-                            }
-                            for group in permission_groups
-                        ]                        
-                        staff_data['permission_groups'] = group_data
-                        
-                        # Add permissions data
-                        permissions = staff.permissions.all()
-                        permission_data = [
-                            {
-                                'id': permission.id,
-                                'codename': permission.codename,
-                                'name': permission.name
-                            }
-                            for permission in permissions
-                        ]
-                        staff_data['permissions'] = permission_data
-                        
-                        user_data['profile'] = staff_data
-
-                elif user.role == 'teacher':
-                    teacher = Teacher.objects.filter(user=user).first()
-                    if teacher is not None:
-                        # Add teacher data to the user_data
-                        user_data['profile'] = TeacherSerializer(teacher).data
-                        try:
-                            teacher_id = int(teacher.id)
-                            user_data['enrollment'] = TeacherEnrollmentAPIView().enrollment(teacher_id)
-                        except Exception as e:
-                            user_data['enrollment'] = None
-
-                elif user.role == 'student':
-                    student = Student.objects.filter(user=user).first()
-                    if student is not None:
-                        # Add student data to the user_data
-                        user_data['profile'] = StudentSerializer(student).data
+                user_data.update(profile_data)
 
                 return Response(user_data, status=status.HTTP_200_OK)
             else:
@@ -254,10 +188,8 @@ class DeactivateUserView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        authorization_header = request.headers.get('Authorization')
-        
-        # Decode the access token to retrieve the user ID
-        user_id = TokenDecoderToGetUserId.decode_token(authorization_header)
+        # The user id comes from the auth context of the request (the validated token)
+        user_id = request.auth_context.user_id
 
         # Deactivate the user based on the retrieved user ID
         try:
@@ -291,62 +223,7 @@ class GetUserByUsernameView(APIView):
             }
 
             try:
-                if user.role == 'administrator':
-                    administrator = Administrator.objects.filter(user=user).first()
-                    if administrator is not None:
-                        # Add administrator data to the user_data
-                        user_data['profile'] = AdministratorSerializer(administrator).data
-
-                if user.role == 'staff':
-                    staff = Staff.objects.filter(user=user).first()
-                    if staff is not None:
-                        # Add staff data to the user_data
-                        staff_data = StaffSerializer(staff).data
-                        
-                        # Add permission groups data
-                        permission_groups = staff.permission_groups.all()
-                        group_data = [
-                            {
-                                'id': group.id,
-                                'name': group.name,
-                                'permissions': [
-                                    {
-                                        'id': permission.id,
-                                        'codename': permission.codename,
-                                        'name': permission.name
-                                    }
-                                    for permission in group.permissions.all()
-                                ]
-                            }
-                            for group in permission_groups
-                        ]                        
-                        staff_data['permission_groups'] = group_data
-                        
-                        # Add permission groups data
-                        permissions = staff.permissions.all()
-                        permission_data = [
-                            {
-                                'id': permission.id,
-                                'codename': permission.codename,
-                                'name': permission.name
-                            }
-                            for permission in permissions
-                        ]
-                        staff_data['permissions'] = permission_data
-                        
-                        user_data['profile'] = staff_data
-
-                elif user.role == 'teacher':
-                    teacher = Teacher.objects.filter(user=user).first()
-                    if teacher is not None:
-                        # Add teacher data to the user_data
-                        user_data['profile'] = TeacherSerializer(teacher).data
-
-                elif user.role == 'student':
-                    student = Student.objects.filter(user=user).first()
-                    if student is not None:
-                        # Add student data to the user_data
-                        user_data['profile'] = StudentSerializer(student).data
+                user_data.update(load_profile(user))
 
             except Exception as e:
                 return Response({"success": False, "message": "Cannot get the user 'profile' data", 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,29 @@
+# core/benchmarking.py
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(latencies, p):
+    """
+        Return the p-th percentile (0 < p <= 1) of sorted latencies in seconds, in milliseconds (0.0 without latencies).
+    """
+    if not latencies:
+        return 0.0
+    return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+
+
+def format_latencies(latencies, precision=3):
+    """
+        Return 'p50=...ms p95=...ms p99=...ms' for sorted latencies in seconds.
+    """
+    return ' '.join(f'p{round(p * 100)}={percentile(latencies, p):.{precision}f}ms' for p in PERCENTILES)
+
+
+def format_report(label, latencies, metrics=None):
+    """
+        Return one report line of a benchmark command: the label, the latency percentiles and the metrics,
+        e.g. {'queries/request': 1.5} is shown as 'queries/request=1.50'.
+    """
+    parts = [f'{label:<14}', format_latencies(latencies)]
+    parts += [f'{name}={value:.2f}' for name, value in (metrics or {}).items()]
+    return ' '.join(parts)
@@ -0,0 +1,208 @@
+# core/cache.py
+
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+
+class ReferenceDataCache:
+    """
+        Cache of reference data: catalog tables that are read on almost every page and change a few times a year.
+
+        Every cached value belongs to a key with a version number. The models a key depends on are registered
+        with register(); their post_save/post_delete signals bump the version, which makes the value stale at once.
+        Values are kept in process memory. If settings.REFERENCE_DATA_CACHE names a cache alias (e.g. a shared Redis),
+        versions and values are kept there as well, so every worker sees the bumps and a value is loaded only once.
+        Without it a bump only reaches the worker that made the change: the others reload their values once they are
+        settings.REFERENCE_DATA_CACHE_TTL seconds old. Deployments with more than one worker need the shared alias
+        for invalidations to take effect at once.
+        The versions also fingerprint the data for HTTP validators, see get_fingerprint() and versioned_etag().
+        Without the shared alias the fingerprints come from version counters stored in the database (ReferenceDataVersion),
+        which are bumped in the same transaction as the change and are the same for every worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = {}  # key -> (version, value, expires at)
+        self._versions = defaultdict(int)  # used when there is no shared backend
+        self._stored_versions = {}  # key -> the last stored version seen by get_fingerprint()
+        self._stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._dependencies = defaultdict(set)  # model -> keys
+
+    def _get_shared_cache(self):
+        alias = getattr(settings, 'REFERENCE_DATA_CACHE', None)
+        return caches[alias] if alias else None
+
+    def _get_local_ttl(self):
+        return getattr(settings, 'REFERENCE_DATA_CACHE_TTL', 60)
+
+    def _keep_local(self, key, version, value):
+        self._local[key] = (version, value, time.monotonic() + self._get_local_ttl())
+
+    def _count(self, key, counter):
+        with self._lock:
+            self._stats[key][counter] += 1
+
+    def get_version(self, key):
+        shared_cache = self._get_shared_cache()
+        if shared_cache is None:
+            return self._versions[key]
+        # a missing (never bumped or evicted) version starts from a number no earlier version can have had
+        return shared_cache.get_or_set(f'reference_data:version:{key}', time.time_ns, timeout=None)
+
+    def bump(self, key):
+        shared_cache = self._get_shared_cache()
+        if shared_cache is None:
+            with self._lock:
+                self._versions[key] += 1
+        else:
+            try:
+                shared_cache.incr(f'reference_data:version:{key}')
+            except ValueError:
+                # the version was evicted: restart from a number no earlier version can have had
+                shared_cache.set(f'reference_data:version:{key}', time.time_ns(), timeout=None)
+        self._local.pop(key, None)
+
+    def _bump_stored_versions(self, keys):
+        from .models import ReferenceDataVersion
+
+        stored = ReferenceDataVersion.objects.filter(key__in=keys)
+        if stored.update(version=models.F('version') + 1) < len(keys):
+            existing = set(stored.values_list('key', flat=True))
+            ReferenceDataVersion.objects.bulk_create(
+                [ReferenceDataVersion(key=key) for key in keys if key not in existing], ignore_conflicts=True
+            )
+
+    def _get_stored_versions(self, keys):
+        from .models import ReferenceDataVersion
+
+        versions = dict(ReferenceDataVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+        for key in keys:
+            version = versions.get(key, 0)
+            if self._stored_versions.get(key) != version:
+                # changed in another worker (or not seen yet): the local value may predate the change
+                self._stored_versions[key] = version
+                self.bump(key)
+        return versions
+
+    def get(self, key, loader):
+        """
+            Return the cached value of key, calling loader() to (re)build it when it is missing or stale.
+        """
+        version = self.get_version(key)
+        shared_cache = self._get_shared_cache()
+        entry = self._local.get(key)
+        # the shared version is authoritative; a local version may have missed a bump in another worker
+        if entry is not None and entry[0] == version and (shared_cache is not None or entry[2] > time.monotonic()):
+            self._count(key, 'hits')
+            return entry[1]
+
+        if shared_cache is not None:
+            value = shared_cache.get(f'reference_data:{key}:{version}')
+            if value is not None:
+                self._keep_local(key, version, value)
+                self._count(key, 'hits')
+                return value
+
+        self._count(key, 'misses')
+        value = loader()
+        # do not keep a value that was invalidated while it was being loaded
+        if self.get_version(key) == version:
+            self._keep_local(key, version, value)
+            if shared_cache is not None:
+                shared_cache.set(f'reference_data:{key}:{version}', value, timeout=None)
+        return value
+
+    def get_fingerprint(self, keys, *extra):
+        """
+            Return a digest of the current versions of keys (and of any extra strings, e.g. the request path).
+            It changes whenever one of the keys is invalidated.
+            Without the shared alias it costs one query on the stored versions, which also drops local values 
+            that another worker has invalidated since, so a view never serves older data under a newer fingerprint.
+        """
+        if self._get_shared_cache() is None:
+            versions = self._get_stored_versions(keys)
+            parts = [f'{key}:{versions.get(key, 0)}' for key in keys] + list(extra)
+        else:
+            parts = [f'{key}:{self.get_version(key)}' for key in keys] + list(extra)
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+    def register(self, key, *models):
+        """
+            Invalidate key whenever a row of one of the models is saved or deleted.
+            key may be a callable that returns the key of the saved/deleted instance (or None), e.g. a per user key.
+            Automatically created m2m through models are invalidated by m2m_changed, so add()/remove() count as well.
+        """
+        for model in models:
+            if not self._dependencies[model]:
+                if model._meta.auto_created:
+                    m2m_changed.connect(self._invalidate, sender=model, dispatch_uid=f'reference_data_cache_{model._meta.label}_m2m')
+                else:
+                    post_save.connect(self._invalidate, sender=model, dispatch_uid=f'reference_data_cache_{model._meta.label}_save')
+                    post_delete.connect(self._invalidate, sender=model, dispatch_uid=f'reference_data_cache_{model._meta.label}_delete')
+            self._dependencies[model].add(key)
+
+    def invalidate(self, *keys):
+        """
+            Make the values of keys stale, for changes that send no signals (queryset update(), bulk_update()).
+        """
+        for key in keys:
+            self.bump(key)
+        if keys and self._get_shared_cache() is None:
+            # written in the transaction of the change, so readers see the new version together with the new rows
+            self._bump_stored_versions(keys)
+        # bump again on commit: a reader in another transaction may have cached the old rows in between
+        transaction.on_commit(lambda: [self.bump(key) for key in keys])
+
+    def _invalidate(self, sender, instance=None, action=None, **kwargs):
+        if action is not None and action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        keys = set()
+        for key in self._dependencies.get(sender, ()):
+            key = key(instance) if callable(key) else key
+            if key is not None:
+                keys.add(key)
+        self.invalidate(*keys)
+
+    def get_stats(self):
+        with self._lock:
+            stats = {key: dict(counters) for key, counters in self._stats.items()}
+        registered_keys = {key for keys in self._dependencies.values() for key in keys if not callable(key)}
+        for key in set(stats) | registered_keys:
+            stats.setdefault(key, {'hits': 0, 'misses': 0})['version'] = self.get_version(key)
+        return {
+            'backend': getattr(settings, 'REFERENCE_DATA_CACHE', None) or 'local',
+            'hits': sum(counters['hits'] for counters in stats.values()),
+            'misses': sum(counters['misses'] for counters in stats.values()),
+            'keys': stats,
+        }
+
+
+reference_data_cache = ReferenceDataCache()
+
+
+def get_profile_key(user_id):
+    return f'profile:{user_id}'
+
+
+def get_reference_profile_key(request, *args, **kwargs):
+    # the profile views take the user id as ?reference=
+    return get_profile_key(request.GET.get('reference'))
+
+
+def versioned_etag(*keys):
+    """
+        Build an etag_func for django.views.decorators.http.condition from reference data keys.
+        A key may be a callable taking the view arguments (request, *args, **kwargs) and returning the key.
+        The ETag is strong: it covers the full path, so query parameters (?fields=, cursor, filters) get their own.
+        The check runs before the view body, so a matching If-None-Match gets a 304 without loading or serializing the data.
+    """
+    def etag_func(request, *args, **kwargs):
+        resolved = [key(request, *args, **kwargs) if callable(key) else key for key in keys]
+        return reference_data_cache.get_fingerprint(resolved, request.get_full_path())
+    return etag_func
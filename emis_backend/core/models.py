@@ -10,3 +10,12 @@ class PermissionGroup(models.Model):
     def __str__(self):
         return self.name
 
+
+class ReferenceDataVersion(models.Model):
+    # Version counter of a reference data key (core/cache.py), bumped in the transaction of every change of its data.
+    # Used for ETags when no shared cache alias is configured.
+    key = models.CharField(max_length=255, unique=True)
+    version = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f'{self.key}: {self.version}'
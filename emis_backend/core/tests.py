@@ -1,3 +1,73 @@
+from django.contrib.auth.models import Permission
 from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from staff.models import Staff
+from staff.permissions import effective_permissions
+from .cache import reference_data_cache
+from .models import PermissionGroup
 
-# Create your tests here.
+
+class EffectivePermissionsTests(TestCase):
+    """
+        staff.permissions.effective_permissions follows the permission groups and the direct permissions of a staff.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.view_permission, cls.change_permission = Permission.objects.filter(
+            content_type__app_label='core', codename__in=['view_permissiongroup', 'change_permissiongroup']
+        ).order_by('-codename')
+        cls.user = User.objects.create(username='permission-test', role='staff')
+        cls.staff = Staff.objects.create(user=cls.user, nid='permission-test')
+        cls.group = PermissionGroup.objects.create(name='Permission test')
+        cls.group.permissions.add(cls.view_permission)
+
+    def setUp(self):
+        # rolling back a test sends no signals: drop what the previous test cached
+        reference_data_cache.bump(effective_permissions.cache_key)
+
+    def assertPermissions(self, *codenames):
+        expected = set(codenames) | {f'core.{codename}' for codename in codenames}
+        self.assertEqual(effective_permissions.get(self.staff.id), expected)
+
+    def test_group_changes_reach_the_staff(self):
+        self.assertPermissions()
+
+        self.staff.permission_groups.add(self.group)
+        self.assertPermissions('view_permissiongroup')
+
+        self.group.permissions.add(self.change_permission)
+        self.assertPermissions('view_permissiongroup', 'change_permissiongroup')
+
+        self.group.permissions.remove(self.view_permission)
+        self.assertPermissions('change_permissiongroup')
+
+        # reverse side of the m2m
+        self.group.staff_permission_groups.remove(self.staff)
+        self.assertPermissions()
+
+    def test_deleting_a_group_drops_its_permissions(self):
+        self.staff.permission_groups.add(self.group)
+        self.staff.permissions.add(self.change_permission)
+        self.assertPermissions('view_permissiongroup', 'change_permissiongroup')
+
+        self.group.delete()
+        self.assertPermissions('change_permissiongroup')
+
+    def test_has_permission_endpoint(self):
+        self.staff.permission_groups.add(self.group)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        def has_permission(codename):
+            response = client.get('/api/staff/has-permission/', {'username': self.user.username, 'permission_codename': codename})
+            return response.json()['has_permission']
+
+        self.assertTrue(has_permission('view_permissiongroup'))
+        self.assertTrue(has_permission('core.view_permissiongroup'))
+        self.assertFalse(has_permission('change_permissiongroup'))
+
+        # an inactive staff has no permission at all
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertFalse(has_permission('view_permissiongroup'))
@@ -4,7 +4,7 @@ app_name = 'core'
 
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
-from .views import CustomContentTypesView, ContentTypePermissionsView, PermissionGroupCreateView, PermissionGroupListView, GroupUpdateView, GroupDeleteView
+from .views import CustomContentTypesView, ContentTypePermissionsView, PermissionGroupCreateView, PermissionGroupListView, GroupUpdateView, GroupDeleteView, ReferenceDataCacheStatsView
 
 
 urlpatterns = [
@@ -14,6 +14,7 @@ urlpatterns = [
     path('permission-group-list/', PermissionGroupListView.as_view(), name='permission_group_list_view'),
     path('permission-group-delete/<int:group_id>/', GroupDeleteView.as_view(), name='permission_group_delete'),
     path('permission-group-update/<int:group_id>/', GroupUpdateView.as_view(), name='permission_group_update'),
+    path('reference-cache-stats/', ReferenceDataCacheStatsView.as_view(), name='reference_cache_stats'),
 ]
 
 
@@ -1,9 +1,8 @@
 # core/views.py
 
-import jwt
 from rest_framework import status
-from django.conf import settings
-from authentication.models import User
+from authentication.permissions import IsAdministratorOrStaff
+from authentication.authentication import get_request_role
 from rest_framework.views import APIView
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
@@ -17,88 +16,11 @@ from django.contrib.contenttypes.models import ContentType
 from rest_framework.mixins import CreateModelMixin, UpdateModelMixin, DestroyModelMixin
 from django.core.exceptions import ObjectDoesNotExist
 from rest_framework.generics import UpdateAPIView
+from .cache import reference_data_cache
 from .serializers import PermissionGroupSerializer
 
 
 
-class TokenDecoder:
-    @staticmethod
-    def decode_token(authorization_header):
-        try:
-            auth_type, access_token = authorization_header.split(' ')
-            if auth_type.lower() != 'bearer':
-                raise ValueError('Invalid Authorization header')
-
-            decoded_token = jwt.decode(
-                access_token, settings.SECRET_KEY, algorithms=['HS256'])
-            return decoded_token
-        except (ValueError, jwt.exceptions.DecodeError):
-            return None
-
-
-class TokenDecoderToGetUserId:
-    @staticmethod
-    def decode_token(authorization_header):
-
-        # Check if the Authorization header is present
-        if not authorization_header:
-            return Response({'message': 'Authorization/Access token missing'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Extract the access token from the Authorization header
-        try:
-            auth_type, access_token = authorization_header.split(' ')
-            if auth_type.lower() != 'bearer':
-                raise ValueError('Invalid Authorization header')
-        except ValueError:
-            return Response({'message': 'Invalid Authorization header'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Decode the access token to retrieve and return the user ID
-        try:
-            decoded_token = jwt.decode(
-                access_token, settings.SECRET_KEY, algorithms=['HS256'])
-            user_id = decoded_token['user_id']
-            return user_id
-        except jwt.exceptions.DecodeError:
-            return Response({'message': 'Invalid access token'}, status=status.HTTP_400_BAD_REQUEST)
-        except KeyError:
-            return Response({'message': 'Invalid access token'}, status=status.HTTP_400_BAD_REQUEST)
-
-
-class TokenDecoderToGetUserRole:
-    @staticmethod
-    def decode_token(authorization_header):
-
-        # Check if the Authorization header is present
-        if not authorization_header:
-            return Response({'message': 'Access token missing'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Extract the access token from the Authorization header
-        try:
-            auth_type, access_token = authorization_header.split(' ')
-            if auth_type.lower() != 'bearer':
-                raise ValueError('Invalid Authorization header')
-        except ValueError:
-            return Response({'message': 'Invalid Authorization header'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Decode the access token to retrieve the user ID
-        try:
-            decoded_token = jwt.decode(
-                access_token, settings.SECRET_KEY, algorithms=['HS256'])
-            user_id = decoded_token['user_id']
-        except jwt.exceptions.DecodeError:
-            return Response({'message': 'Invalid access token'}, status=status.HTTP_400_BAD_REQUEST)
-        except KeyError:
-            return Response({'message': 'Invalid access token'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Get and return the user role
-        try:
-            user = User.objects.get(id=user_id)
-            user_role = user.role
-            return user_role
-        except User.DoesNotExist:
-            return Response({'message': 'User from access token not found'}, status=status.HTTP_404_NOT_FOUND)
-
-
 class CustomContentTypesView(APIView):
     def get(self, request):
         from django.conf import settings
@@ -153,11 +75,7 @@ class PermissionGroupCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        authorization_header = request.headers.get('Authorization')
-
-        # Decode the access token to retrieve the user ID
-        request_user_role = TokenDecoderToGetUserRole.decode_token(
-            authorization_header)
+        request_user_role = get_request_role(request)
 
         if request_user_role != 'administrator':
             return Response({"success": False, "message": "Only administrators can create permission groups"})
@@ -185,11 +103,7 @@ class PermissionGroupListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        authorization_header = request.headers.get('Authorization')
-
-        # Decode the access token to retrieve the user ID
-        request_user_role = TokenDecoderToGetUserRole.decode_token(
-            authorization_header)
+        request_user_role = get_request_role(request)
 
         if request_user_role != 'administrator':
             return Response({"success": False, "message": "Only administrators can view permission groups"})
@@ -217,11 +131,7 @@ class PermissionGroupListView(APIView):
 
 class GroupDeleteView(APIView):
     def delete(self, request, group_id):
-        authorization_header = request.headers.get('Authorization')
-
-        # Decode the access token to retrieve the user ID
-        request_user_role = TokenDecoderToGetUserRole.decode_token(
-            authorization_header)
+        request_user_role = get_request_role(request)
 
         if request_user_role != 'administrator':
             return Response({"success": False, "message": "Only administrators can delete permission groups"})
@@ -239,10 +149,7 @@ class GroupUpdateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def put(self, request, group_id):
-        authorization_header = request.headers.get('Authorization')
-
-        # Decode the access token to retrieve the user ID
-        request_user_role = TokenDecoderToGetUserRole.decode_token(authorization_header)
+        request_user_role = get_request_role(request)
 
         if request_user_role != 'administrator':
             return Response({"success": False, "message": "Only administrators can update permission groups"})
@@ -273,4 +180,12 @@ class GroupUpdateView(APIView):
 
 
 
+class ReferenceDataCacheStatsView(APIView):
+    """
+        Hit/miss counters and current versions of the reference data cache (core/cache.py) of this process.
+    """
+
+    permission_classes = [IsAdministratorOrStaff]
 
+    def get(self, request):
+        return Response(reference_data_cache.get_stats())
@@ -209,8 +209,12 @@ GOOGLE_DRIVE_API_CREDENTIALS = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication that also attaches request.auth_context (user id, role, profile id, claims)
+        'authentication.authentication.ContextJWTAuthentication',
     ],
+    # opt-in: lists are only paginated when the client sends ?cursor= or ?page_size=
+    'DEFAULT_PAGINATION_CLASS': 'academy.pagination.OptionalCursorPagination',
+    'PAGE_SIZE': 100,
 }
 
 SIMPLE_JWT = {
@@ -270,6 +274,19 @@ CORS_ALLOW_METHODS = [
 ]
 
 
+# Reference data cache (core/cache.py): process memory by default. 
+# Set it to a CACHES alias backed by a shared server (e.g. Redis) to share cached catalogs and their versions between workers.
+# Deployments with more than one worker need it: in process memory, a change is only seen at once by the worker that made it,
+# the others serve their copy for up to REFERENCE_DATA_CACHE_TTL seconds.
+REFERENCE_DATA_CACHE = os.getenv('REFERENCE_DATA_CACHE') or None
+REFERENCE_DATA_CACHE_TTL = int(os.getenv('REFERENCE_DATA_CACHE_TTL', 60))
+
+# Authenticated user cache (authentication/cache.py): process memory by default, or a CACHES alias shared between workers.
+# Users are invalidated when saved; the TTL (seconds) bounds how long another worker's process memory can serve a stale user.
+AUTH_USER_CACHE = os.getenv('AUTH_USER_CACHE') or None
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 30))
+
+
 # For ERD generations with django-extensions 
 GRAPH_MODELS = {
 #   'app_labels': ["myapp1", "myapp2", "auth"],
@@ -2,6 +2,7 @@
 
 from django.db import models
 from authentication.models import User
+from core.cache import get_profile_key, reference_data_cache
 from django.contrib.auth.models import Permission
 from core.models import PermissionGroup
 
@@ -34,3 +35,15 @@ class Staff(models.Model):
     def __str__(self):
         return str(self.id)
 
+
+# reverse m2m changes (group.staff_permission_groups.add()) have a PermissionGroup/Permission instance
+reference_data_cache.register(
+    lambda staff: get_profile_key(staff.user_id) if isinstance(staff, Staff) else None,
+    Staff, Staff.permission_groups.through, Staff.permissions.through
+)
+
+# effective permission sets (staff/permissions.py)
+reference_data_cache.register(
+    'staff_permissions',
+    Staff.permissions.through, Staff.permission_groups.through, PermissionGroup, PermissionGroup.permissions.through, Permission
+)
@@ -0,0 +1,47 @@
+# staff/permissions.py
+
+from core.cache import reference_data_cache
+
+
+class EffectivePermissions:
+    """
+        The effective permissions of every staff member: the direct Staff.permissions merged with the permissions
+        of the staff's permission groups, kept in the reference data cache (core/cache.py) under 'staff_permissions'.
+        Each staff has a frozenset holding every permission both as 'codename' (as the frontend checks it)
+        and as 'app_label.codename' (as User.has_perm takes it), so a check is a single membership test.
+        The cache key is invalidated by changes of Staff.permissions, Staff.permission_groups, PermissionGroup and
+        PermissionGroup.permissions (registered in staff/models.py), i.e. by StaffUpdatePermissionsView,
+        GroupUpdateView and GroupDeleteView.
+    """
+
+    cache_key = 'staff_permissions'
+
+    def _build(self):
+        from .models import Staff
+
+        # one query for the direct permissions and one for the group permissions of all staff
+        rows = list(Staff.objects.filter(permissions__isnull=False).values_list(
+            'id', 'permissions__content_type__app_label', 'permissions__codename'
+        ))
+        rows += Staff.objects.filter(permission_groups__permissions__isnull=False).values_list(
+            'id', 'permission_groups__permissions__content_type__app_label', 'permission_groups__permissions__codename'
+        )
+        permissions = {}
+        for staff_id, app_label, codename in rows:
+            permissions.setdefault(staff_id, set()).update((codename, f'{app_label}.{codename}'))
+        return {staff_id: frozenset(codenames) for staff_id, codenames in permissions.items()}
+
+    def get(self, staff_id):
+        """
+            Return the effective permissions of a staff (empty if the staff has none).
+        """
+        return reference_data_cache.get(self.cache_key, self._build).get(staff_id, frozenset())
+
+    def has_permission(self, staff_id, permission):
+        """
+            Check a permission given as 'codename' or 'app_label.codename'.
+        """
+        return permission in self.get(staff_id)
+
+
+effective_permissions = EffectivePermissions()
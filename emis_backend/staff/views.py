@@ -2,7 +2,10 @@
 
 import json
 from datetime import date
+from core.cache import get_reference_profile_key, versioned_etag
 from django.core import serializers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.http import HttpResponse, JsonResponse
 from rest_framework import status, generics, viewsets
 from rest_framework.mixins import DestroyModelMixin
@@ -14,6 +17,7 @@ from authentication.serializers import UserSerializer
 from authentication.views import UserDeleteView
 from rest_framework.views import APIView
 from .models import Staff
+from .permissions import effective_permissions
 from .serializers import StaffSerializer
 from core.models import PermissionGroup
 from django.contrib.auth.models import Permission
@@ -75,6 +79,7 @@ class CustomJSONEncoder(serializers.json.DjangoJSONEncoder):
 class GetStaffView(APIView):
     permission_classes = [IsAdministratorOrStaff]
     
+    @method_decorator(condition(etag_func=versioned_etag(get_reference_profile_key)))
     def get(self, request):
         user_id = request.GET.get('reference')
         try:
@@ -173,9 +178,14 @@ class StaffHasPermissionView(APIView):
         
         if username and permission_codename:
             try:
-                user = User.objects.get(username=username)
-                staff = Staff.objects.get(user=user)
-                has_permission = staff.user.has_perm(permission_codename)
+                staff_id, is_superuser, is_active = User.objects.values_list(
+                    'staff__id', 'is_superuser', 'is_active'
+                ).get(username=username)
+                if staff_id is None:
+                    raise Staff.DoesNotExist
+                # direct and group permissions, codename or app_label.codename (staff/permissions.py)
+                # like User.has_perm, an inactive user has no permission at all
+                has_permission = is_active and (is_superuser or effective_permissions.has_permission(staff_id, permission_codename))
                 data = {'has_permission': has_permission}
                 return JsonResponse(data)
             except User.DoesNotExist:
@@ -2,6 +2,7 @@
 
 from django.db import models
 from authentication.models import User
+from core.cache import get_profile_key, reference_data_cache
 
 class Student(models.Model):
     GENDER_CHOICES = (
@@ -29,3 +30,5 @@ class Student(models.Model):
     history = models.JSONField(blank=True, null=True)
     user = models.OneToOneField(User, on_delete=models.CASCADE, blank=True, null=True)
 
+
+reference_data_cache.register(lambda student: get_profile_key(student.user_id), Student)
@@ -6,7 +6,10 @@ from authentication.models import User
 from authentication.serializers import UserSerializer
 from authentication.views import UserDeleteView
 from datetime import date
+from core.cache import get_reference_profile_key, versioned_etag
 from django.core import serializers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.http import HttpResponse, JsonResponse
 from rest_framework import status, generics, viewsets
 from rest_framework.generics import GenericAPIView
@@ -75,6 +78,7 @@ class CustomJSONEncoder(serializers.json.DjangoJSONEncoder):
 class GetStudentView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(condition(etag_func=versioned_etag(get_reference_profile_key, 'batches', 'semesters')))
     def get(self, request):
         user_id = request.GET.get('reference')
         try:
@@ -2,6 +2,7 @@
 
 from django.db import models
 from authentication.models import User
+from core.cache import get_profile_key, reference_data_cache
 
 
 #####################################################################
@@ -32,6 +33,9 @@ class Teacher(models.Model):
     
     def __str__(self):
         return self.acronym
+
+
+reference_data_cache.register(lambda teacher: get_profile_key(teacher.user_id), Teacher)
 #####################################################################
 
 